@@ -0,0 +1,652 @@
+"""Offline benchmarks for the bot's hot paths.
+
+Runs against stand-in Discord objects, so no token or network is needed.
+Bot data files are created in a temporary directory.
+
+Usage:
+    python benchmark.py giveaway-clicks [--clicks 10000] [--rate 5000]
+    python benchmark.py lean-profile [--guilds 200] [--members 2000]
+    python benchmark.py load-test [--duration 10] [--join-rate 200] [--invite-rate 20]
+                                  [--click-rate 500] [--warn-rate 20] [--rest-latency-ms 50]
+    python benchmark.py startup [--guilds 200] [--users 200]
+    python benchmark.py render [--iterations 2000] [--users 200]
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Import the bot from a scratch directory so benchmarks never touch real data
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(tempfile.mkdtemp(prefix='bot-benchmark-'))
+import main
+
+# ========================================
+# STAND-IN DISCORD OBJECTS
+# ========================================
+
+class FakeAsset:
+    def __init__(self, user_id):
+        self.key = str(user_id)
+        self.url = f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png"
+
+class FakeUser:
+    def __init__(self, user_id, roles=()):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = FakeAsset(user_id)
+        self.roles = list(roles)
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.roles = {}
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+
+class FakeResponse:
+    """Records when the interaction was first acknowledged"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, ephemeral=False, embed=None, **kwargs):
+        # discord.py serializes embeds before sending
+        self.interaction.acked_at = time.perf_counter()
+        self.interaction.replies.append(embed.to_dict() if embed else content)
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, ephemeral=False, embed=None, **kwargs):
+        self.interaction.completed_at = time.perf_counter()
+        self.interaction.replies.append(embed.to_dict() if embed else content)
+
+class FakeInteraction:
+    def __init__(self, guild, message, user):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.message = message
+        self.user = user
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.replies = []
+        self.created_at = None
+        self.acked_at = None
+        self.completed_at = None
+
+# ========================================
+# HELPERS
+# ========================================
+
+def report(title, rows):
+    print(f"\n{title}")
+    for name, value in rows:
+        print(f"  {name:<24} {value}")
+
+def latency_rows(label, samples_ms):
+    return [
+        (f"{label} p50", f"{main.percentile(samples_ms, 50):.3f} ms"),
+        (f"{label} p99", f"{main.percentile(samples_ms, 99):.3f} ms"),
+        (f"{label} max", f"{max(samples_ms):.3f} ms"),
+    ]
+
+# ========================================
+# BENCHMARKS
+# ========================================
+
+async def bench_giveaway_clicks(clicks, rate):
+    """Replay a click flood against GiveawayView.join_button"""
+    bot = main.bot
+    guild = FakeGuild(1)
+    message = FakeMessage(1000)
+    guild_id, message_id = str(guild.id), str(message.id)
+
+    bot.giveaways.create(guild_id, message_id, {
+        'active': True,
+        'channel_id': 1,
+        'end_time': main.datetime.utcnow().isoformat(),
+        'min_invites': 1,
+        'required_role_id': None,
+        'winners': 1,
+        'winner_ids': [],
+        'participants': []
+    })
+    # Half the clickers meet the invite requirement
+    for user_id in range(0, clicks, 2):
+        bot.invites_db.set([guild_id, str(user_id)], 1)
+
+    bot.flusher.start()
+    bot.giveaway_joins.start()
+    view = main.GiveawayView(bot)
+
+    async def click(interaction):
+        interaction.created_at = time.perf_counter()
+        await view.join_button.callback(interaction)
+
+    # Every 10th click is a repeat from an earlier user
+    interactions = [
+        FakeInteraction(guild, message, FakeUser(i - 5 if i % 10 == 9 else i))
+        for i in range(clicks)
+    ]
+    flushes_before = bot.flusher.flushes
+    started = time.perf_counter()
+    tasks = []
+    for i, interaction in enumerate(interactions):
+        tasks.append(asyncio.create_task(click(interaction)))
+        # Pace arrivals at the requested rate
+        behind = started + (i + 1) / rate - time.perf_counter()
+        if behind > 0:
+            await asyncio.sleep(behind)
+    await asyncio.gather(*tasks)
+
+    # Wait for every deferred click to get its followup
+    while any(not i.replies for i in interactions):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    ack_ms = [(i.acked_at - i.created_at) * 1000 for i in interactions]
+    done_ms = [(i.completed_at - i.created_at) * 1000 for i in interactions if i.completed_at]
+    joined = len(bot.giveaways.get(guild_id, message_id)['participants'])
+
+    report(f"giveaway-clicks: {clicks} clicks at {rate}/s", [
+        *latency_rows("ack", ack_ms),
+        *latency_rows("result", done_ms),
+        ("joined", joined),
+        ("batches", bot.giveaway_joins.batches),
+        ("flushes", bot.flusher.flushes - flushes_before),
+        ("throughput", f"{clicks / elapsed:.0f} clicks/s"),
+    ])
+    await bot.flusher.stop()
+
+# Discord sends guild members in chunks of up to 1000
+MEMBER_CHUNK_SIZE = 1000
+BOT_USER_ID = 1
+
+def synthetic_guild(guild_id, member_count, lean):
+    """GUILD_CREATE payload plus the member chunks a profile would receive"""
+    def member(user_id):
+        return {
+            'user': {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0', 'avatar': None, 'global_name': None},
+            'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0
+        }
+
+    user_ids = [guild_id * 100000 + i for i in range(member_count)]
+    online = user_ids[:member_count // 5]
+    data = {
+        'id': str(guild_id), 'name': f"guild{guild_id}", 'owner_id': str(user_ids[0]),
+        'member_count': member_count + 1, 'large': member_count > 250, 'features': [],
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0}],
+        'channels': [{'id': str(guild_id * 10 + i), 'type': 0, 'name': f"channel{i}", 'position': i,
+                      'permission_overwrites': []} for i in range(20)],
+        'emojis': [], 'stickers': [], 'voice_states': [], 'threads': [],
+        'members': [member(BOT_USER_ID)],
+        'presences': [],
+    }
+    chunks = []
+    if not lean:
+        data['members'] += [member(user_id) for user_id in online]
+        data['presences'] = [
+            {'user': {'id': str(user_id)}, 'status': 'online', 'client_status': {'desktop': 'online'},
+             'activities': [{'name': 'A Game', 'type': 0, 'created_at': 0}]}
+            for user_id in online
+        ]
+        rest = user_ids[len(online):]
+        chunks = [[member(user_id) for user_id in rest[i:i + MEMBER_CHUNK_SIZE]] for i in range(0, len(rest), MEMBER_CHUNK_SIZE)]
+    return data, chunks
+
+def load_guilds(lean, guilds):
+    """Feed synthetic guilds into a connection state built with a profile's settings"""
+    client = main.discord.Client(intents=main.bot_intents(lean), **main.cache_options(lean))
+    state = client._connection
+    state.user = main.discord.ClientUser(state=state, data={
+        'id': str(BOT_USER_ID), 'username': 'bot', 'discriminator': '0', 'avatar': None, 'bot': True
+    })
+    for data, chunks in guilds:
+        guild = state._add_guild_from_data(data)
+        for chunk in chunks:
+            for member_data in chunk:
+                guild._add_member(main.discord.Member(data=member_data, guild=guild, state=state))
+    return client
+
+async def bench_lean_profile(guild_count, members):
+    """Compare gateway startup cost and cache memory of the default and lean profiles"""
+    # Heavy-tailed guild sizes averaging ``members``, the same for both profiles
+    rng = random.Random(0)
+    sizes = [max(1, int(rng.paretovariate(1.5) * members / 3)) for _ in range(guild_count)]
+
+    rows = []
+    for label, lean in (("default", False), ("lean", True)):
+        guilds = [synthetic_guild(guild_id, size, lean) for guild_id, size in enumerate(sizes, 1)]
+
+        started = time.perf_counter()
+        client = load_guilds(lean, guilds)
+        parse_s = time.perf_counter() - started
+        cached = sum(len(guild.members) for guild in client.guilds)
+        del client
+        gc.collect()
+
+        tracemalloc.start()
+        client = load_guilds(lean, guilds)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        del client
+        gc.collect()
+
+        intents = main.bot_intents(lean)
+        rows += [
+            (f"{label} intents", f"{intents.value} (presences={intents.presences}, message_content={intents.message_content})"),
+            (f"{label} chunk events", sum(len(chunks) for _, chunks in guilds)),
+            (f"{label} members cached", cached),
+            (f"{label} parse time", f"{parse_s * 1000:.0f} ms"),
+            (f"{label} cache memory", f"{memory_mb:.1f} MB"),
+        ]
+
+    report(f"lean-profile: {guild_count} guilds, ~{members} members each", rows)
+
+# ========================================
+# OFFLINE LOAD TEST
+# ========================================
+
+APPLICATION_ID = 900000000000000000
+AUTO_ROLE = 700000000000000000
+MODERATOR_ID = 800000000000000000
+MODERATOR_ROLE = 750000000000000000  # Above the auto-role, so /warn passes the hierarchy check
+
+class FakeDiscordAPI:
+    """Answers the REST and webhook routes the bot uses after a simulated round trip, bumping invite uses on joins"""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.calls = {}  # {(method, route): count}
+        self.invites = {}  # {guild_id: {code: invite payload}}
+        self.acked = {}  # {interaction token: perf_counter}
+        self.completed = {}  # {interaction token: perf_counter}
+        self.message_ids = itertools.count(600000000000000000)
+
+    async def request(self, route, session=None, **kwargs):
+        key = (route.method, route.path)
+        self.calls[key] = self.calls.get(key, 0) + 1
+        await asyncio.sleep(self.latency)
+
+        params = route.__dict__
+        if key == ('GET', '/guilds/{guild_id}/invites'):
+            return [dict(invite) for invite in self.invites.get(int(params['guild_id']), {}).values()]
+        if key in (('GET', '/guilds/{guild_id}/members/{user_id}'), ('PATCH', '/guilds/{guild_id}/members/{user_id}')):
+            return member_payload(int(params['user_id']))
+        if key == ('POST', '/interactions/{webhook_id}/{webhook_token}/callback'):
+            self.acked.setdefault(params['webhook_token'], time.perf_counter())
+            return {'interaction': {'id': str(params['webhook_id']), 'type': 2}}
+        if key == ('POST', '/webhooks/{webhook_id}/{webhook_token}'):
+            self.completed.setdefault(params['webhook_token'], time.perf_counter())
+            if (kwargs.get('params') or {}).get('wait'):
+                return message_payload(next(self.message_ids), 1)
+            return None
+        if key == ('PUT', '/applications/{application_id}/commands'):
+            return []
+        return None  # Role adds, deletes and anything else without a body
+
+class FakeWebhookAdapter(main.discord.webhook.async_.AsyncWebhookAdapter):
+    """Sends interaction responses and followups to the fake API"""
+
+    def __init__(self, api):
+        super().__init__()
+        self.api = api
+
+    async def request(self, route, session=None, **kwargs):
+        return await self.api.request(route, **kwargs)
+
+def user_payload(user_id, bot=False):
+    return {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0', 'avatar': None, 'global_name': None, 'bot': bot}
+
+def member_payload(user_id, roles=(), permissions=None):
+    data = {
+        'user': user_payload(user_id), 'roles': [str(role) for role in roles],
+        'joined_at': main.discord.utils.utcnow().isoformat(), 'deaf': False, 'mute': False, 'flags': 0
+    }
+    if permissions is not None:
+        data['permissions'] = str(permissions)
+    return data
+
+def message_payload(message_id, channel_id):
+    return {
+        'id': str(message_id), 'channel_id': str(channel_id), 'author': user_payload(BOT_USER_ID, bot=True),
+        'content': '', 'timestamp': main.discord.utils.utcnow().isoformat(), 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+        'embeds': [], 'pinned': False, 'type': 0, 'components': []
+    }
+
+def invite_payload(guild_id, channel_id, code, inviter_id):
+    return {
+        'code': code, 'guild_id': str(guild_id), 'channel_id': str(channel_id), 'channel': {'id': str(channel_id), 'name': 'general', 'type': 0},
+        'inviter': user_payload(inviter_id), 'uses': 0, 'max_uses': 0, 'max_age': 0, 'temporary': False,
+        'created_at': main.discord.utils.utcnow().isoformat()
+    }
+
+def interaction_payload(interaction_id, guild_id, channel_id, user_id, data, interaction_type, message=None):
+    payload = {
+        'id': str(interaction_id), 'application_id': str(APPLICATION_ID), 'type': interaction_type,
+        'token': f"token{interaction_id}", 'version': 1, 'guild_id': str(guild_id), 'channel_id': str(channel_id),
+        'member': member_payload(
+            user_id, roles=[MODERATOR_ROLE] if user_id == MODERATOR_ID else (), permissions=main.discord.Permissions.all().value
+        ),
+        'app_permissions': str(main.discord.Permissions.all().value), 'locale': 'en-US', 'guild_locale': 'en-US',
+        'entitlements': [], 'authorizing_integration_owners': {}, 'attachment_size_limit': 10485760, 'data': data
+    }
+    if message is not None:
+        payload['message'] = message
+    return payload
+
+async def paced(rate, duration, action):
+    """Call ``action(i)`` ``rate`` times per second for ``duration`` seconds"""
+    if rate <= 0:
+        return 0
+    started = time.perf_counter()
+    count = int(rate * duration)
+    for i in range(count):
+        action(i)
+        behind = started + (i + 1) / rate - time.perf_counter()
+        if behind > 0:
+            await asyncio.sleep(behind)
+    return count
+
+async def bench_load_test(duration, guild_count, join_rate, invite_rate, click_rate, warn_rate, rest_latency_ms):
+    """Drive a full DiscordBot with synthetic gateway traffic and a fake REST API"""
+    bot = main.bot
+    api = FakeDiscordAPI(rest_latency_ms)
+    bot.http.request = api.request
+    main.discord.webhook.async_.async_context.set(FakeWebhookAdapter(api))
+
+    await bot._async_setup_hook()
+    state = bot._connection
+    state.user = main.discord.ClientUser(state=state, data=user_payload(BOT_USER_ID, bot=True))
+    state.application_id = APPLICATION_ID
+
+    # Guilds with a moderator, an auto-role, a few invites and a running giveaway
+    guild_ids = [100000000000000000 + i for i in range(guild_count)]
+    giveaway_messages = {}
+    for guild_id in guild_ids:
+        channel_id = guild_id + 1
+        state._add_guild_from_data({
+            'id': str(guild_id), 'name': f"guild{guild_id}", 'owner_id': str(MODERATOR_ID), 'member_count': 2,
+            'large': False, 'features': [], 'emojis': [], 'stickers': [], 'voice_states': [], 'threads': [], 'presences': [],
+            'roles': [
+                {'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                 'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0},
+                {'id': str(AUTO_ROLE), 'name': 'member', 'permissions': '0', 'position': 1, 'color': 0,
+                 'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0},
+                {'id': str(MODERATOR_ROLE), 'name': 'moderator', 'permissions': '0', 'position': 2, 'color': 0,
+                 'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0},
+            ],
+            'channels': [{'id': str(channel_id), 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []}],
+            'members': [member_payload(BOT_USER_ID), member_payload(MODERATOR_ID, roles=[MODERATOR_ROLE])],
+        })
+        bot.guild_config.set(guild_id, 'auto_role_id', AUTO_ROLE)
+        api.invites[guild_id] = {
+            f"inv{guild_id}x{i}": invite_payload(guild_id, channel_id, f"inv{guild_id}x{i}", MODERATOR_ID + 1 + i)
+            for i in range(5)
+        }
+        message = message_payload(next(api.message_ids), channel_id)
+        giveaway_messages[guild_id] = message
+        bot.giveaways.create(str(guild_id), message['id'], {
+            'active': True, 'channel_id': channel_id, 'end_time': (main.datetime.utcnow() + main.timedelta(days=1)).isoformat(),
+            'min_invites': 0, 'required_role_id': None, 'winners': 1, 'winner_ids': [], 'participants': []
+        })
+
+    await bot.setup_hook()
+    warn_command = bot.tree.get_command('warn')
+    # What startup warmup does after on_ready: a baseline invite snapshot per guild
+    await asyncio.gather(*(bot.invite_tracker.refresh(guild) for guild in bot.guilds))
+    api.calls.clear()
+
+    rng = random.Random(0)
+    user_ids = itertools.count(200000000000000000)
+    interaction_ids = itertools.count(300000000000000000)
+    joined = []
+    dispatched = {}  # {interaction token: perf_counter}
+    clicked = []  # Tokens of clicks, which finish with a followup
+    invite_codes = itertools.count()
+
+    def join(i):
+        guild_id = rng.choice(guild_ids)
+        invite = rng.choice(list(api.invites[guild_id].values()))
+        invite['uses'] += 1
+        user_id = next(user_ids)
+        joined.append((guild_id, user_id))
+        state.parse_guild_member_add({'guild_id': str(guild_id), **member_payload(user_id)})
+
+    def change_invite(i):
+        guild_id = rng.choice(guild_ids)
+        invites = api.invites[guild_id]
+        if i % 2 == 0 or len(invites) < 2:
+            code = f"new{next(invite_codes)}"
+            invites[code] = invite_payload(guild_id, guild_id + 1, code, MODERATOR_ID + rng.randint(1, 50))
+            state.parse_invite_create(invites[code])
+        else:
+            code = rng.choice(list(invites))
+            invite = invites.pop(code)
+            state.parse_invite_delete({'code': code, 'guild_id': invite['guild_id'], 'channel_id': invite['channel_id']})
+
+    def click(i):
+        guild_id = rng.choice(guild_ids)
+        interaction_id = next(interaction_ids)
+        payload = interaction_payload(
+            interaction_id, guild_id, guild_id + 1, next(user_ids),
+            {'custom_id': 'giveaway:join', 'component_type': 2}, 3, message=giveaway_messages[guild_id]
+        )
+        dispatched[payload['token']] = time.perf_counter()
+        clicked.append(payload['token'])
+        state.parse_interaction_create(payload)
+
+    def warn(i):
+        if not joined:
+            return
+        guild_id, user_id = rng.choice(joined[-200:])  # Spam lands on recent joiners
+        payload = interaction_payload(next(interaction_ids), guild_id, guild_id + 1, MODERATOR_ID, {
+            'id': str(APPLICATION_ID + 1), 'name': warn_command.name, 'type': 1,
+            'options': [{'name': 'user', 'type': 6, 'value': str(user_id)}, {'name': 'reason', 'type': 3, 'value': 'spam'}],
+            'resolved': {'users': {str(user_id): user_payload(user_id)},
+                         'members': {str(user_id): {k: v for k, v in member_payload(user_id).items() if k != 'user'}}}
+        }, 2)
+        dispatched[payload['token']] = time.perf_counter()
+        state.parse_interaction_create(payload)
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(
+        paced(join_rate, duration, join),
+        paced(invite_rate, duration, change_invite),
+        paced(click_rate, duration, click),
+        paced(warn_rate, duration, warn),
+    )
+    offered_s = time.perf_counter() - started
+
+    # Let queued work (invite batches, role assignments, click batches) drain
+    drain_deadline = time.perf_counter() + 30
+    while time.perf_counter() < drain_deadline and (
+        bot.auto_roles.pending or bot.invite_tracker.pending or bot.giveaway_joins.queue
+        or any(token not in api.acked for token in dispatched)
+        or any(token not in api.completed for token in clicked)
+    ):
+        await asyncio.sleep(0.05)
+    await bot.flusher.flush()
+    elapsed = time.perf_counter() - started
+
+    def handler_rows(name, label, value):
+        hist = main.metrics.series(name).get(((label, value),)) or main.metrics.series(name).get(((label, value), ('status', 'ok')))
+        if not hist or not hist.recent:
+            return []
+        samples = [seconds * 1000 for seconds in hist.recent]
+        return latency_rows(value, samples)
+
+    response_ms = [(api.acked[token] - at) * 1000 for token, at in dispatched.items() if token in api.acked]
+    credited = sum(sum(users.values()) for users in bot.invites_db.values())
+    written = sum(main.metrics.series('db_bytes_written_total').values())
+    flushes = sum(hist.count for hist in main.metrics.series('db_flush_seconds').values())
+    role_stats = bot.auto_roles.stats()
+
+    report(f"load-test: {duration}s, {guild_count} guilds, REST latency {rest_latency_ms}ms", [
+        ("joins", f"{counts[0]} ({counts[0] / offered_s:.0f}/s)"),
+        ("invite changes", f"{counts[1]} ({counts[1] / offered_s:.0f}/s)"),
+        ("giveaway clicks", f"{counts[2]} ({counts[2] / offered_s:.0f}/s)"),
+        ("warns", f"{counts[3]} ({counts[3] / offered_s:.0f}/s)"),
+        ("drain time", f"{elapsed - offered_s:.2f} s"),
+        *handler_rows('event_seconds', 'event', 'on_member_join'),
+        *handler_rows('event_seconds', 'event', 'join_button'),
+        *handler_rows('command_seconds', 'command', 'warn'),
+        *(latency_rows("interaction ack", response_ms) if response_ms else []),
+        ("joins credited", credited),
+        ("roles assigned", f"{role_stats['assigned']} (p99 {role_stats['time_to_role_p99_ms']} ms after join)"),
+        ("REST calls", sum(api.calls.values())),
+        *((f"  {method} {route}", count) for (method, route), count in sorted(api.calls.items(), key=lambda item: -item[1])),
+        ("disk bytes written", f"{written} in {flushes} flushes"),
+        ("loop stalls", bot.watchdog.stalls),
+    ])
+    bot.watchdog.stop()
+    await bot.flusher.stop()
+
+def bench_startup(guild_count, users):
+    """Database open time and first-access cost: eager JSON log vs lazy SQLite"""
+    rng = random.Random(0)
+    data = {
+        str(guild_id): {str(guild_id * 100000 + i): rng.randint(1, 50) for i in range(users)}
+        for guild_id in range(1, guild_count + 1)
+    }
+    main.atomic_write_json('startup.json', data)
+    # Migrate once up front; the benchmark measures later restarts
+    main.SQLiteStorage('startup.json').load()
+
+    rows = []
+    for label, engine in (("jsonlog", main.JSONLogStorage), ("sqlite", main.SQLiteStorage)):
+        gc.collect()
+        tracemalloc.start()
+        db = main.Database('startup.json', storage=engine('startup.json'), cache_size=100)
+        started = time.perf_counter()
+        db.open()
+        open_s = time.perf_counter() - started
+
+        samples = []
+        for guild_id in rng.sample(range(1, guild_count + 1), min(200, guild_count)):
+            started = time.perf_counter()
+            db.get_path([str(guild_id), str(guild_id * 100000)])
+            samples.append((time.perf_counter() - started) * 1000)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        db.close()
+
+        rows += [
+            (f"{label} open", f"{open_s * 1000:.0f} ms"),
+            *latency_rows(f"{label} first read", samples),
+            (f"{label} memory", f"{memory_mb:.1f} MB"),
+        ]
+
+    report(f"startup: {guild_count} guilds x {users} users", rows)
+
+async def bench_render(iterations, users):
+    """Response build time of /help, /invites and /topinvites, rebuilt vs cached"""
+    bot = main.bot
+    guild = FakeGuild(1)
+    guild_id = str(guild.id)
+    rng = random.Random(0)
+    for user_id in range(1, users + 1):
+        bot.invites_db.set([guild_id, str(user_id)], rng.randint(1, 500))
+        bot.user_names.put(user_id, f"user{user_id}")
+    for member_id in range(10000, 10000 + users * 5):
+        bot.invite_history.record_join(guild_id, str(member_id), str(rng.randint(1, users)), 'code')
+    window = main.app_commands.Choice(name="Last 7 days", value=7)
+
+    commands = {
+        'help': lambda interaction: bot.tree.get_command('help').callback(interaction),
+        'invites': lambda interaction: bot.tree.get_command('invites').callback(interaction, None, None),
+        'invites 7d': lambda interaction: bot.tree.get_command('invites').callback(interaction, None, window),
+        'topinvites': lambda interaction: bot.tree.get_command('topinvites').callback(interaction, 1),
+    }
+    rows = []
+    for name, run in commands.items():
+        for label, rebuild in (("rebuilt", True), ("cached", False)):
+            samples = []
+            for i in range(iterations):
+                interaction = FakeInteraction(guild, None, FakeUser(1 + i % users))
+                started = time.perf_counter()
+                if rebuild:
+                    # What every call cost before responses were cached
+                    bot.embeds.entries.clear()
+                    if name == 'help':
+                        main.HELP_EMBED = main.build_help_embed()
+                await run(interaction)
+                samples.append((time.perf_counter() - started) * 1000)
+            rows.append((f"{name} {label} p50", f"{main.percentile(samples, 50):.3f} ms"))
+            rows.append((f"{name} {label} p99", f"{main.percentile(samples, 99):.3f} ms"))
+
+    # What a user who is over the limit costs: the check only
+    command = bot.tree.get_command('invites')
+    spammer = FakeInteraction(guild, None, FakeUser(1))
+    spammer.created_at = main.discord.utils.utcnow()  # Cooldowns are keyed on interaction time
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        try:
+            await command._check_can_run(spammer)
+        except main.app_commands.CommandOnCooldown:
+            pass
+        samples.append((time.perf_counter() - started) * 1000)
+    rows.append(("cooldown reject p50", f"{main.percentile(samples, 50):.3f} ms"))
+
+    report(f"render: {iterations} responses per command, {users} inviters", rows)
+
+BENCHMARKS = {
+    'giveaway-clicks': bench_giveaway_clicks,
+    'lean-profile': bench_lean_profile,
+    'load-test': bench_load_test,
+    'startup': bench_startup,
+    'render': bench_render,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the bot's hot paths")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--clicks', type=int, default=10000, help="giveaway-clicks: number of clicks")
+    parser.add_argument('--rate', type=int, default=5000, help="giveaway-clicks: clicks per second")
+    parser.add_argument('--guilds', type=int, default=200, help="lean-profile, startup: number of synthetic guilds")
+    parser.add_argument('--members', type=int, default=2000, help="lean-profile: average members per guild")
+    parser.add_argument('--users', type=int, default=200, help="startup, render: users per guild in the synthetic database")
+    parser.add_argument('--iterations', type=int, default=2000, help="render: responses built per command and mode")
+    parser.add_argument('--duration', type=float, default=10, help="load-test: seconds of traffic")
+    parser.add_argument('--load-guilds', type=int, default=20, help="load-test: number of guilds")
+    parser.add_argument('--join-rate', type=float, default=200, help="load-test: member joins per second")
+    parser.add_argument('--invite-rate', type=float, default=20, help="load-test: invite creates/deletes per second")
+    parser.add_argument('--click-rate', type=float, default=500, help="load-test: giveaway clicks per second")
+    parser.add_argument('--warn-rate', type=float, default=20, help="load-test: /warn commands per second")
+    parser.add_argument('--rest-latency-ms', type=float, default=50, help="load-test: simulated REST round trip")
+    args = parser.parse_args()
+
+    if args.benchmark == 'giveaway-clicks':
+        asyncio.run(bench_giveaway_clicks(args.clicks, args.rate))
+    elif args.benchmark == 'lean-profile':
+        asyncio.run(bench_lean_profile(args.guilds, args.members))
+    elif args.benchmark == 'load-test':
+        asyncio.run(bench_load_test(
+            args.duration, args.load_guilds, args.join_rate, args.invite_rate,
+            args.click_rate, args.warn_rate, args.rest_latency_ms
+        ))
+    elif args.benchmark == 'startup':
+        bench_startup(args.guilds, args.users)
+    elif args.benchmark == 'render':
+        asyncio.run(bench_render(args.iterations, args.users))
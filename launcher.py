@@ -0,0 +1,119 @@
+"""Runs the bot as several worker processes, each owning a range of shards.
+
+Every worker is a normal ``main.py`` process started with SHARD_COUNT,
+SHARD_IDS and CLUSTER_ID set, so it connects only its own shards and keeps
+its own slice of the databases. Crashed workers are restarted.
+
+Usage:
+    python launcher.py --workers 4              # shard count from Discord
+    python launcher.py --workers 4 --shards 16
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN = os.getenv('DISCORD_TOKEN')
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+# Discord allows one IDENTIFY per 5 seconds (per max_concurrency bucket)
+IDENTIFY_INTERVAL = 5
+
+def recommended_shards() -> int:
+    """Ask Discord how many shards this bot should run"""
+    request = urllib.request.Request(
+        'https://discord.com/api/v10/gateway/bot',
+        headers={'Authorization': f'Bot {TOKEN}', 'User-Agent': 'DiscordBot launcher'}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['shards']
+
+def split_shards(shard_count, workers) -> list:
+    """Split shard ids into contiguous ranges, one per worker"""
+    per_worker, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for worker in range(workers):
+        size = per_worker + (1 if worker < extra else 0)
+        if size:
+            ranges.append(range(start, start + size))
+        start += size
+    return ranges
+
+class Worker:
+    def __init__(self, cluster_id, shard_ids, shard_count):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.restarts = 0
+
+    def start(self):
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=f"{self.shard_ids[0]}-{self.shard_ids[-1]}",
+            CLUSTER_ID=str(self.cluster_id)
+        )
+        self.process = subprocess.Popen([sys.executable, MAIN], env=env)
+        print(f"🚀 Worker {self.cluster_id} started: shards {self.shard_ids[0]}-{self.shard_ids[-1]} (pid {self.process.pid})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as sharded worker processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument('--shards', type=int, default=None, help="Total shard count (default: Discord's recommendation)")
+    args = parser.parse_args()
+
+    if not TOKEN:
+        print("❌ DISCORD_TOKEN not found in .env file!")
+        return
+
+    shard_count = args.shards or recommended_shards()
+    workers = [
+        Worker(cluster_id, list(shard_ids), shard_count)
+        for cluster_id, shard_ids in enumerate(split_shards(shard_count, args.workers))
+    ]
+    print(f"✅ Running {shard_count} shards across {len(workers)} workers")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for worker in workers:
+            if worker.process and worker.process.poll() is None:
+                worker.process.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Stagger startup so each worker's shards identify after the previous worker's
+    for worker in workers:
+        if stopping:
+            break
+        worker.start()
+        time.sleep(len(worker.shard_ids) * IDENTIFY_INTERVAL)
+
+    while not stopping:
+        for worker in workers:
+            if worker.process.poll() is not None and not stopping:
+                worker.restarts += 1
+                print(f"⚠️  Worker {worker.cluster_id} exited with code {worker.process.returncode}, restarting...")
+                time.sleep(min(60, 2 ** worker.restarts))
+                worker.start()
+        time.sleep(1)
+
+    for worker in workers:
+        if worker.process:
+            worker.process.wait()
+    print("✅ All workers stopped")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,33 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import aiohttp
+from aiohttp import web
 import json
 import os
 import asyncio
-from datetime import datetime, timedelta
+import bisect
+import contextlib
+import hashlib
+import heapq
+import io
+import itertools
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import random
+import re
+
+# Process start, for time-to-ready
+PROCESS_STARTED = time.monotonic()
 
 # Load environment variables
 load_dotenv()
@@ -14,27 +35,2190 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 LICENSE_KEY = os.getenv('LICENSE_KEY')
 LICENSE_BOT_ID = os.getenv('LICENSE_BOT_ID')  # Discord User ID of the license bot
-AUTO_ROLE_ID = os.getenv('AUTO_ROLE_ID')  # Optional: Role ID for auto-role
+AUTO_ROLE_ID = os.getenv('AUTO_ROLE_ID', '').strip()  # Optional: Role ID for auto-role
+AUTO_ROLE_ID = int(AUTO_ROLE_ID) if AUTO_ROLE_ID.isdigit() else None
+
+# License file, and how often it's re-read while running
+LICENSE_FILE = 'license.json'
+LICENSE_REVALIDATE_SECONDS = int(os.getenv('LICENSE_REVALIDATE_SECONDS', '3600'))
 
 # Database files
 INVITES_DB = 'invites.json'
+INVITE_HISTORY_DB = 'invite_history.json'
 GIVEAWAY_DB = 'giveaway.json'
 WARNINGS_DB = 'warnings.json'
+CONFIG_DB = 'config.json'
+
+# Slash commands are only uploaded when their hash differs from the last sync (FORCE_SYNC=1 always syncs)
+COMMAND_SYNC_FILE = 'command_sync.json'
+FORCE_SYNC = os.getenv('FORCE_SYNC', '').lower() in ('1', 'true', 'yes')
+
+# Storage engine ('jsonlog' or 'sqlite') and log length that triggers compaction
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'jsonlog')
+COMPACT_EVERY = int(os.getenv('COMPACT_EVERY', '1000'))
+# How often buffered database writes are flushed to disk
+FLUSH_INTERVAL_MS = int(os.getenv('FLUSH_INTERVAL_MS', '500'))
+# Guilds per database kept in memory when the engine loads them on demand (sqlite)
+DB_CACHE_GUILDS = int(os.getenv('DB_CACHE_GUILDS', '5000'))
+
+# Sharding: setting SHARD_COUNT or SHARDED=1 runs AutoShardedBot. SHARD_IDS ("0-3" or "0,2")
+# and CLUSTER_ID are set by launcher.py for each worker process.
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS_SPEC = os.getenv('SHARD_IDS', '')
+SHARDED = bool(SHARD_COUNT) or os.getenv('SHARDED', '').lower() in ('1', 'true', 'yes')
+CLUSTER_ID = os.getenv('CLUSTER_ID')
+
+# Auto-role: worker pool size, role assignments per second per guild, retries on 429/5xx
+AUTO_ROLE_WORKERS = int(os.getenv('AUTO_ROLE_WORKERS', '4'))
+AUTO_ROLE_RATE = float(os.getenv('AUTO_ROLE_RATE', '5'))
+AUTO_ROLE_RETRIES = 3
+
+# Purge: most messages per command, history scanned looking for matches,
+# one-by-one deletes per second for messages too old to bulk delete, seconds between progress updates
+PURGE_MAX = 10000
+PURGE_SCAN_LIMIT = 50000
+PURGE_SINGLE_RATE = float(os.getenv('PURGE_SINGLE_RATE', '1'))
+PURGE_PROGRESS_INTERVAL = 5
+
+# Mass moderation: most targets per command, requests in flight and requests per second per guild
+MASS_ACTION_MAX = 1000
+MASS_ACTION_CONCURRENCY = int(os.getenv('MASS_ACTION_CONCURRENCY', '5'))
+MASS_ACTION_RATE = float(os.getenv('MASS_ACTION_RATE', '10'))
+
+# Prometheus-style metrics endpoint (disabled when METRICS_PORT is unset); workers add CLUSTER_ID to the port
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) + int(os.getenv('CLUSTER_ID') or 0) if os.getenv('METRICS_PORT') else None
+
+# Event-loop watchdog: stalls longer than this are logged with the blocking stack,
+# at most once per WATCHDOG_LOG_INTERVAL seconds per handler. WATCHDOG_STRICT_MS makes any
+# stall that long fatal (for tests).
+WATCHDOG_THRESHOLD_MS = int(os.getenv('WATCHDOG_THRESHOLD_MS', '250'))
+WATCHDOG_STRICT_MS = int(os.getenv('WATCHDOG_STRICT_MS')) if os.getenv('WATCHDOG_STRICT_MS') else None
+WATCHDOG_LOG_INTERVAL = 60
+
+# Lean mode: request only the intents the features need and skip the member cache
+LEAN_MODE = os.getenv('LEAN_MODE', '').lower() in ('1', 'true', 'yes')
+# Usernames remembered for leaderboards when the member cache is trimmed
+USER_NAME_CACHE_SIZE = 10000
+
+# Seconds to collect a burst of joins before attributing them with one fetch
+INVITE_DEBOUNCE_SECONDS = float(os.getenv('INVITE_DEBOUNCE_SECONDS', '1.5'))
+# Seconds a deleted one-use invite can still be credited for a join
+DELETED_INVITE_TTL = 60
+
+# Startup invite warmup: parallel fetches and fetches per second across all guilds
+WARMUP_CONCURRENCY = int(os.getenv('WARMUP_CONCURRENCY', '8'))
+WARMUP_RATE = float(os.getenv('WARMUP_RATE', '20'))
+# Invite cache saved between restarts, ignored once older than this many seconds
+INVITE_SNAPSHOT_FILE = 'invite_snapshot.json'
+INVITE_SNAPSHOT_MAX_AGE = int(os.getenv('INVITE_SNAPSHOT_MAX_AGE', '600'))
+
+# Giveaway joins: max clicks per batch and how long a burst is gathered first
+JOIN_BATCH_SIZE = int(os.getenv('JOIN_BATCH_SIZE', '500'))
+JOIN_BATCH_WAIT_MS = int(os.getenv('JOIN_BATCH_WAIT_MS', '50'))
+
+# Inviters shown per /topinvites page
+LEADERBOARD_PAGE_SIZE = 10
+# Daily invite buckets kept per inviter, i.e. the longest /invites window
+INVITE_HISTORY_DAYS = 30
+# Built embeds kept for reuse across guilds
+EMBED_CACHE_SIZE = int(os.getenv('EMBED_CACHE_SIZE', '10000'))
+# Read-only commands (/help, /invites, /topinvites, /ping): uses per user per period in seconds
+COMMAND_COOLDOWN_RATE = int(os.getenv('COMMAND_COOLDOWN_RATE', '3'))
+COMMAND_COOLDOWN_SECONDS = float(os.getenv('COMMAND_COOLDOWN_SECONDS', '10'))
 
-class Database:
-    """Simple JSON database handler"""
+# Warnings stop counting after this many days (0 = never)
+WARN_TTL_DAYS = int(os.getenv('WARN_TTL_DAYS', '90'))
+# Auto-timeout rules: "<warnings>/<window>=<timeout>", e.g. 3 warnings in 24h -> 1h timeout
+WARN_ESCALATION = os.getenv('WARN_ESCALATION', '3/24h=1h')
+
+# ========================================
+# HELPERS
+# ========================================
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class LRUCache(OrderedDict):
+    """Dict that drops its least recently used entries beyond ``capacity``"""
+    
+    def __init__(self, capacity):
+        super().__init__()
+        self.capacity = capacity
+    
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+    
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.capacity:
+            self.popitem(last=False)
+
+class EmbedCache:
+    """Built embeds memoized per (guild_id, key) and the data version they show"""
+    
+    def __init__(self, capacity=None):
+        self.entries = LRUCache(capacity or EMBED_CACHE_SIZE)
+    
+    def get(self, guild_id, key, version):
+        cached = self.entries.get((guild_id, key))
+        hit = cached is not None and cached[0] == version
+        metrics.inc('embed_cache_total', result='hit' if hit else 'miss')
+        return cached[1] if hit else None
+    
+    def put(self, guild_id, key, version, embed):
+        self.entries.put((guild_id, key), (version, embed))
+        return embed
+
+# ========================================
+# METRICS
+# ========================================
+
+class Histogram:
+    """Cumulative latency buckets plus recent samples for percentiles"""
+    
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=1000)
+    
+    def observe(self, value):
+        i = bisect.bisect_left(self.BUCKETS, value)
+        if i < len(self.counts):
+            self.counts[i] += 1  # Larger values only count towards +Inf
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+    
+    def percentile(self, pct):
+        return percentile(self.recent, pct) if self.recent else 0.0
+
+class Metrics:
+    """In-process counters, histograms and gauges, served in the Prometheus text format"""
+    
+    def __init__(self):
+        self.counters = {}  # {(name, labels): value}
+        self.histograms = {}  # {(name, labels): Histogram}
+        self.gauges = {}  # {name: callback}
+        self.server = None
     
     @staticmethod
-    def load(filename):
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+    
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+    
+    def gauge(self, name, callback):
+        self.gauges[name] = callback
+    
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+    
+    def series(self, name) -> dict:
+        """{labels: counter value or Histogram} for one metric name"""
+        found = {labels: value for (key, labels), value in self.counters.items() if key == name}
+        found.update({labels: value for (key, labels), value in self.histograms.items() if key == name})
+        return found
+    
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}={json.dumps(str(v))}' for k, v in pairs) + '}'
+    
+    def render(self) -> str:
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        
+        for (name, labels), hist in sorted(self.histograms.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, cumulative in zip(Histogram.BUCKETS, itertools.accumulate(hist.counts)):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {hist.count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {hist.sum}")
+            lines.append(f"{name}_count{self._labels(labels)} {hist.count}")
+        
+        for name, callback in sorted(self.gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+    
+    def http_trace(self) -> aiohttp.TraceConfig:
+        """aiohttp hooks counting Discord REST calls by route, status and 429s"""
+        trace = aiohttp.TraceConfig()
+        
+        async def on_request_end(session, context, params):
+            route = rest_route(params.url.path)
+            status = params.response.status
+            self.inc('discord_rest_requests_total', method=params.method, route=route, status=status)
+            if status == 429:
+                self.inc('discord_rate_limited_total', route=route)
+        
+        async def on_request_exception(session, context, params):
+            self.inc('discord_rest_requests_total', method=params.method, route=rest_route(params.url.path), status='error')
+        
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+    
+    async def start(self, host=None, port=None):
+        """Serve the HTTP endpoint when a port is configured"""
+        port = METRICS_PORT if port is None else port
+        if not port or self.server is not None:
+            return
+        
+        async def handle(request):
+            return web.Response(text=self.render(), content_type='text/plain')
+        
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        self.server = web.AppRunner(app, access_log=None)
+        await self.server.setup()
+        try:
+            await web.TCPSite(self.server, host or METRICS_HOST, port).start()
+            print(f"✅ Metrics on http://{host or METRICS_HOST}:{port}/metrics")
+        except OSError as e:
+            print(f"❌ Could not start metrics endpoint: {e}")
+    
+    async def stop(self):
+        if self.server is not None:
+            await self.server.cleanup()
+            self.server = None
+
+def rest_route(path: str) -> str:
+    """Collapse IDs and tokens in an API path so routes can be counted"""
+    parts = []
+    for part in path.split('/'):
+        if part.isdigit():
+            part = '{id}'
+        elif len(part) > 32:
+            part = '{token}'
+        parts.append(part)
+    return '/'.join(parts).replace('/api/v10', '', 1)
+
+class TimedCommandTree(app_commands.CommandTree):
+    """Command tree that records how long each slash command takes"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras['started'] = time.perf_counter()
+        return True
+    
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CommandOnCooldown):
+            # Turned away by the cooldown check, before the command did any work
+            observe_command(interaction, 'cooldown')
+            await interaction.response.send_message(f"⏳ Slow down! Try again in {error.retry_after:.0f}s", ephemeral=True)
+            return
+        observe_command(interaction, 'error')
+        await super().on_error(interaction, error)
+
+def observe_command(interaction: discord.Interaction, status: str):
+    started = interaction.extras.get('started')
+    if started is not None and interaction.command is not None:
+        metrics.observe('command_seconds', time.perf_counter() - started, command=interaction.command.qualified_name, status=status)
+
+metrics = Metrics()
+
+# ========================================
+# WATCHDOG
+# ========================================
+
+class BlockingCallError(Exception):
+    """A handler blocked the event loop longer than strict mode allows"""
+
+class LoopWatchdog:
+    """Measures event-loop lag and logs the stack of whatever blocked the loop"""
+    
+    def __init__(self, threshold_ms=None, strict_ms=None, interval=0.05):
+        self.threshold = (threshold_ms or WATCHDOG_THRESHOLD_MS) / 1000
+        self.strict = strict_ms / 1000 if strict_ms else None
+        self.interval = interval
+        self.capture_after = min(self.threshold, self.strict or self.threshold)
+        
+        self.loop = None
+        self.loop_thread_id = None
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+        
+        self.beat = time.monotonic()
+        self.captured = None  # (beat, task_name, handler, stack) for the current stall
+        self.last_logged = {}  # {handler: monotonic time}
+        self.suppressed = {}  # {handler: stalls not logged since}
+        self.stalls = 0
+        self.violations = []
+    
+    def start(self):
+        """Start watching the running loop"""
+        if self.task is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.beat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.create_task(self._heartbeat())
+        self.thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.stopped.set()
+    
+    async def _heartbeat(self):
+        while True:
+            started = self.beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            metrics.observe('event_loop_lag_seconds', lag)
+            
+            captured, self.captured = self.captured, None
+            if lag >= self.capture_after:
+                self._stalled(lag, captured if captured and captured[0] == started else None)
+    
+    def _watch(self):
+        """Runs in the watchdog thread"""
+        while not self.stopped.wait(self.interval / 2):
+            beat = self.beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue >= self.capture_after and (self.captured is None or self.captured[0] != beat):
+                self.captured = (beat, *self._capture())
+    
+    def _capture(self):
+        """Name and stack of whatever the loop thread is running right now"""
+        frame = sys._current_frames().get(self.loop_thread_id)
+        # asyncio's own frames are the same for every stall; leave them out
+        entries = traceback.extract_stack(frame) if frame is not None else []
+        stack = traceback.format_list([entry for entry in entries if f"{os.sep}asyncio{os.sep}" not in entry.filename])
+        
+        task = asyncio.current_task(self.loop)
+        task_name = task.get_name() if task else 'callback'
+        
+        # The innermost bot function on the stack is the handler to blame
+        handler = task_name
+        while frame is not None:
+            if frame.f_code.co_filename == __file__:
+                handler = frame.f_code.co_name
+                break
+            frame = frame.f_back
+        return task_name, handler, stack
+    
+    def _stalled(self, lag, captured):
+        self.stalls += 1
+        task_name, handler, stack = captured[1:] if captured else ('unknown', 'unknown', [])
+        metrics.inc('event_loop_stalls_total', handler=handler)
+        
+        strict = self.strict is not None and lag >= self.strict
+        if strict:
+            self.violations.append(f"{handler} blocked the event loop for {lag * 1000:.0f}ms\n{''.join(stack[-8:])}")
+        
+        if lag >= self.threshold or strict:
+            now = time.monotonic()
+            if not strict and now - self.last_logged.get(handler, -WATCHDOG_LOG_INTERVAL) < WATCHDOG_LOG_INTERVAL:
+                self.suppressed[handler] = self.suppressed.get(handler, 0) + 1
+            else:
+                self.last_logged[handler] = now
+                suppressed = self.suppressed.pop(handler, 0)
+                note = f" ({suppressed} more since last report)" if suppressed else ""
+                print(f"⚠️  Event loop blocked for {lag * 1000:.0f}ms in {handler} (task {task_name!r}){note}")
+                if stack:
+                    print(''.join(stack[-8:]).rstrip())
+        
+        if strict:
+            self.check()
+    
+    def check(self):
+        """Raise if strict mode recorded any violations"""
+        if self.violations:
+            raise BlockingCallError(f"{len(self.violations)} blocking call(s):\n" + "\n".join(self.violations))
+
+# ========================================
+# STORAGE
+# ========================================
+
+def atomic_write_json(filename, data):
+    """Write JSON to a temp file, then rename it over the target"""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+def read_json(filename):
+    """Load a JSON file"""
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def write_json(filename, data):
+    """Readable JSON for files people edit by hand"""
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=4)
+
+def apply_op(data, op):
+    """Apply a logged ['set', path, value] or ['del', path] operation to a nested dict"""
+    action, path = op[0], op[1]
+    node = data
+    for key in path[:-1]:
+        node = node[key] if isinstance(node, list) else node.setdefault(key, {})
+    
+    last = path[-1]
+    if action == 'set':
+        if isinstance(node, list) and last == len(node):
+            node.append(op[2])
+        else:
+            node[last] = op[2]
+    elif action == 'del':
+        node.pop(last, None)
+
+class Storage:
+    """Base class for database storage engines"""
+    
+    # Engines that can load one top-level key without reading everything;
+    # they also implement ``keys()`` and ``load_key(key)``
+    lazy = False
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.log_size = 0  # Operations written since the last compaction
+    
+    def load(self) -> dict:
+        """Return the full data set (snapshot with the log replayed)"""
+        raise NotImplementedError
+    
+    def append(self, records):
+        """Durably record a batch of ``(top_level_key, encoded_op)`` pairs"""
+        raise NotImplementedError
+    
+    def compact(self):
+        """Fold the log into a fresh snapshot"""
+        raise NotImplementedError
+    
+    def close(self):
+        pass
+
+class JSONLogStorage(Storage):
+    """JSON snapshot file plus an append-only log of JSON lines"""
+    
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.log_filename = f"{filename}.log"
+        self._log = None
+    
+    def load(self) -> dict:
+        data = {}
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r') as f:
+                data = json.load(f)
+        
+        self.log_size = 0
+        if os.path.exists(self.log_filename):
+            with open(self.log_filename, 'r') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crash
+                    apply_op(data, op)
+                    self.log_size += 1
+        return data
+    
+    def append(self, records):
+        if self._log is None:
+            self._log = open(self.log_filename, 'a+')
+            # Terminate a torn last line so it can't swallow the next op
+            if self._log.tell() > 0:
+                self._log.seek(self._log.tell() - 1)
+                if self._log.read(1) != '\n':
+                    self._log.write('\n')
+        
+        self._log.write(''.join(line + '\n' for _, line in records))
+        self._log.flush()
+        self.log_size += len(records)
+    
+    def compact(self):
+        self.close()
+        atomic_write_json(self.filename, self.load())
+        # A crash before this point only leaves already-applied ops in the log
+        open(self.log_filename, 'w').close()
+        self.log_size = 0
+    
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+class SQLiteStorage(Storage):
+    """SQLite database in WAL mode with one snapshot row per top-level key"""
+    
+    lazy = True
+    
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.db_filename = os.path.splitext(filename)[0] + '.sqlite3'
+        self.conn = None
+        self.reader = None
+    
+    def _connect(self):
+        if self.conn is None:
+            # Writes may come from an executor thread
+            self.conn = sqlite3.connect(self.db_filename, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            with self.conn:
+                self.conn.execute('CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+                self.conn.execute('CREATE TABLE IF NOT EXISTS ops (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, op TEXT NOT NULL)')
+                self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS ops_by_key ON ops (key, id)')
+            self._migrate()
+        return self.conn
+    
+    def _migrate(self):
+        """One-time import of the legacy JSON file"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return
+        
+        with self.conn:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r') as f:
+                    legacy = json.load(f)
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO snapshot (key, value) VALUES (?, ?)',
+                    [(key, json.dumps(value)) for key, value in legacy.items()]
+                )
+                print(f"✅ Migrated {self.filename} to {self.db_filename}")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (datetime.utcnow().isoformat(),))
+    
+    def load(self) -> dict:
+        conn = self._connect()
+        data = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM snapshot')}
+        
+        self.log_size = 0
+        for (op,) in conn.execute('SELECT op FROM ops ORDER BY id'):
+            apply_op(data, json.loads(op))
+            self.log_size += 1
+        return data
+    
+    def keys(self) -> list:
+        """Top-level keys"""
+        # Fold the log first so the snapshot has every live key
+        self.compact()
+        return [key for (key,) in self._connect().execute('SELECT key FROM snapshot')]
+    
+    def load_key(self, key):
+        """One top-level value with its logged ops replayed, or None"""
+        if self.reader is None:
+            self._connect()
+            self.reader = sqlite3.connect(self.db_filename, check_same_thread=False, isolation_level=None)
+        
+        # One read transaction, so a compaction can't land between the two queries
+        self.reader.execute('BEGIN')
+        try:
+            row = self.reader.execute('SELECT value FROM snapshot WHERE key = ?', (key,)).fetchone()
+            ops = self.reader.execute('SELECT op FROM ops WHERE key = ? ORDER BY id', (key,)).fetchall()
+        finally:
+            self.reader.execute('COMMIT')
+        
+        data = {key: json.loads(row[0])} if row else {}
+        for (op,) in ops:
+            apply_op(data, json.loads(op))
+        return data.get(key)
+    
+    def append(self, records):
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT INTO ops (key, op) VALUES (?, ?)', records)
+        self.log_size += len(records)
+    
+    def compact(self):
+        conn = self._connect()
+        with conn:
+            rows = conn.execute('SELECT id, key, op FROM ops ORDER BY id').fetchall()
+            if not rows:
+                return
+            
+            folded = {}
+            for _, key, op in rows:
+                if key not in folded:
+                    row = conn.execute('SELECT value FROM snapshot WHERE key = ?', (key,)).fetchone()
+                    folded[key] = {key: json.loads(row[0])} if row else {}
+                apply_op(folded[key], json.loads(op))
+            
+            for key, data in folded.items():
+                if key in data:
+                    conn.execute('INSERT OR REPLACE INTO snapshot (key, value) VALUES (?, ?)', (key, json.dumps(data[key])))
+                else:
+                    conn.execute('DELETE FROM snapshot WHERE key = ?', (key,))
+            conn.execute('DELETE FROM ops WHERE id <= ?', (rows[-1][0],))
+        self.log_size = 0
+    
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+STORAGE_ENGINES = {
+    'jsonlog': JSONLogStorage,
+    'sqlite': SQLiteStorage,
+}
+
+class Database(Mapping):
+    """Persistent JSON-style dict; write through set, delete, increment or append"""
+    
+    def __init__(self, filename, storage=None, owns=None, cache_size=None):
+        self.filename = filename
+        self.storage = storage or STORAGE_ENGINES[STORAGE_BACKEND](filename)
+        self.owns = owns  # Only keep the top-level keys (guilds) this process is responsible for
+        self.cache_size = cache_size or DB_CACHE_GUILDS
+        self.data = None
+        self.keys_ = None  # Every top-level key, when loading lazily
+        self.open_lock = threading.Lock()
+        
+        # Encoded ops waiting for the flusher, keyed by path, in replay order
+        self.pending = {}
+        self.pending_prefixes = {}  # {path prefix: buffered paths below it}
+        self.coalesced = 0
+        self.flushing = 0  # Flushes in progress; nothing is evicted meanwhile
+        self.versions = {}  # {top-level key: writes so far}, for caches built from this data
+    
+    def open(self):
+        """Read the database (or its key list); safe to call from an executor"""
+        with self.open_lock:
+            if self.data is not None:
+                return
+            started = time.perf_counter()
+            if self.storage.lazy:
+                self.keys_ = {key for key in self.storage.keys() if self.owns is None or self.owns(key)}
+                self.data = OrderedDict()
+            else:
+                data = self.storage.load()
+                if self.owns is not None:
+                    data = {key: value for key, value in data.items() if self.owns(key)}
+                self.data = data
+            metrics.observe('db_open_seconds', time.perf_counter() - started, db=os.path.basename(self.filename))
+    
+    def _get(self, key):
+        if self.data is None:
+            self.open()
+        if key in self.data:
+            if self.keys_ is not None:
+                self.data.move_to_end(key)
+            return self.data[key]
+        if self.keys_ is None or key not in self.keys_:
+            raise KeyError(key)
+        
+        value = self.storage.load_key(key)
+        metrics.inc('db_lazy_loads_total', db=os.path.basename(self.filename))
+        self.data[key] = value
+        return value
+    
+    def evict(self):
+        """Drop least recently used guilds beyond ``cache_size`` that have no unsaved writes"""
+        if self.keys_ is None or self.flushing or len(self.data) <= self.cache_size:
+            return
+        dirty = {top_key for top_key, _ in self.pending.values()}
+        for key in list(itertools.islice(self.data, len(self.data) - self.cache_size)):
+            if key not in dirty:
+                del self.data[key]
+    
+    def __getitem__(self, key):
+        return self._get(key)
+    
+    def __iter__(self):
+        if self.data is None:
+            self.open()
+        return iter(list(self.keys_) if self.keys_ is not None else self.data)
+    
+    def __len__(self):
+        if self.data is None:
+            self.open()
+        return len(self.keys_ if self.keys_ is not None else self.data)
+    
+    def get_path(self, path, default=None):
+        """Look up a nested value, e.g. ``get_path([guild_id, user_id], 0)``"""
+        try:
+            node = self._get(path[0])
+        except KeyError:
+            return default
+        for key in path[1:]:
+            try:
+                node = node[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return node
+    
+    def set(self, path, value):
+        self._write(['set', list(path), value])
+    
+    def delete(self, path):
+        self._write(['del', list(path)])
+    
+    def increment(self, path, amount=1):
+        value = self.get_path(path, 0) + amount
+        self.set(path, value)
+        return value
+    
+    def append(self, path, value):
+        """Append to the list at path, creating it if needed"""
+        items = self.get_path(path)
+        if items is None:
+            self.set(path, [value])
+        else:
+            self.set(list(path) + [len(items)], value)
+    
+    def _write(self, op):
+        top_key = op[1][0]
+        try:
+            self._get(top_key)  # Load the guild before changing it
+        except KeyError:
+            pass
+        apply_op(self.data, op)
+        self.versions[top_key] = self.versions.get(top_key, 0) + 1
+        if self.keys_ is not None:
+            if top_key in self.data:
+                self.keys_.add(top_key)
+            else:
+                self.keys_.discard(top_key)
+        
+        # Encode now so the flusher thread never touches live data
+        replaced = self._buffer(tuple(op[1]), (op[1][0], json.dumps(op, separators=(',', ':'))))
+        if replaced:
+            self.coalesced += replaced
+            metrics.inc('db_writes_coalesced_total', replaced, db=os.path.basename(self.filename))
+    
+    def _buffer(self, path, record) -> int:
+        """Buffer an encoded op; returns how many buffered ops it superseded"""
+        replaced = 0
+        if self.pending_prefixes.get(path):
+            # Everything buffered below this path is overwritten by it
+            for child in [buffered for buffered in self.pending if buffered[:len(path)] == path and buffered != path]:
+                self._unbuffer(child)
+                replaced += 1
+        if path in self.pending:
+            replaced += 1
+        else:
+            for depth in range(1, len(path)):
+                self.pending_prefixes[path[:depth]] = self.pending_prefixes.get(path[:depth], 0) + 1
+        # Assigning an existing key keeps its place, ahead of later writes that may depend on it
+        self.pending[path] = record
+        return replaced
+    
+    def _unbuffer(self, path):
+        del self.pending[path]
+        for depth in range(1, len(path)):
+            prefix = path[:depth]
+            self.pending_prefixes[prefix] -= 1
+            if not self.pending_prefixes[prefix]:
+                del self.pending_prefixes[prefix]
+    
+    def take_pending(self):
+        """Swap out the write buffer, returning its ``(path, record)`` items"""
+        pending, self.pending, self.pending_prefixes = self.pending, {}, {}
+        return list(pending.items())
+    
+    def restore_pending(self, items):
+        """Put back items from a failed flush, followed by the writes buffered since"""
+        newer = self.pending
+        self.pending, self.pending_prefixes = {}, {}
+        for path, record in itertools.chain(items, newer.items()):
+            self._buffer(path, record)
+    
+    def write_records(self, items) -> bool:
+        """Write taken items to storage (blocking); returns True if it also compacted the log"""
+        self.storage.append([record for _, record in items])
+        if self.storage.log_size >= COMPACT_EVERY:
+            try:
+                self.storage.compact()
+            except Exception as e:
+                # The records are already in the log; compaction is retried next flush
+                print(f"❌ Error compacting {self.filename}: {e}")
+                return False
+            return True
+        return False
+    
+    def close(self):
+        if self.pending:
+            self.write_records(self.take_pending())
+        self.storage.close()
+
+class WriteBehindFlusher:
+    """Flushes dirty databases in the background from a worker thread"""
+    
+    def __init__(self, databases, interval_ms=None):
+        self.databases = databases
+        self.interval = (interval_ms or FLUSH_INTERVAL_MS) / 1000
+        # One thread keeps writes to each file in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-flush')
+        self.task = None
+        # Timer and on-demand flushes (giveaway joins) take turns, so a failed
+        # flush can't put back ops behind ones a later flush already wrote
+        self.lock = asyncio.Lock()
+        
+        # Metrics
+        self.flushes = 0
+        self.records_written = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+    
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+    
+    async def flush(self):
+        """Write out every dirty database"""
+        async with self.lock:
+            await self._flush()
+    
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        for db in self.databases:
+            if not db.pending:
+                continue
+            
+            items = db.take_pending()
+            started = time.perf_counter()
+            name = os.path.basename(db.filename)
+            db.flushing += 1
+            try:
+                compacted = await loop.run_in_executor(self.executor, db.write_records, items)
+            except Exception as e:
+                print(f"❌ Error flushing {db.filename}: {e}")
+                metrics.inc('db_flush_errors_total', db=name)
+                db.restore_pending(items)
+                continue
+            finally:
+                db.flushing -= 1
+            db.evict()
+            
+            elapsed = time.perf_counter() - started
+            metrics.observe('db_flush_seconds', elapsed, db=name)
+            metrics.inc('db_bytes_written_total', sum(len(record) + 1 for _, (_, record) in items), db=name)
+            if compacted:
+                metrics.inc('db_compactions_total', db=name)
+            
+            elapsed_ms = elapsed * 1000
+            self.flushes += 1
+            self.records_written += len(items)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+    
+    async def stop(self):
+        """Stop the background task and flush everything that's left"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+        self.executor.shutdown(wait=True)
+    
+    def stats(self) -> dict:
+        return {
+            'flushes': self.flushes,
+            'records_written': self.records_written,
+            'writes_coalesced': sum(db.coalesced for db in self.databases),
+            'pending': sum(len(db.pending) for db in self.databases),
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'max_flush_ms': round(self.max_flush_ms, 2),
+            'avg_flush_ms': round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+        }
+
+# ========================================
+# GATEWAY
+# ========================================
+
+def bot_intents(lean=None) -> discord.Intents:
+    """Gateway intents: everything, or only what the features use in lean mode"""
+    if not (LEAN_MODE if lean is None else lean):
+        return discord.Intents.all()
+    
+    intents = discord.Intents.none()
+    intents.guilds = True  # Guilds, channels and roles
+    intents.members = True  # Member joins for auto-role and invite tracking
+    intents.invites = True  # Keeps the invite cache current
+    return intents
+
+def cache_options(lean=None) -> dict:
+    """Member cache settings: no member cache and no chunking in lean mode"""
+    if not (LEAN_MODE if lean is None else lean):
         return {}
+    return {
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'chunk_guilds_at_startup': False
+    }
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int):
+    """Member from the cache, or fetched when it isn't cached; None if they left"""
+    member = guild.get_member(user_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+    return member
+
+async def get_user_name(bot_instance, user_id: int) -> str:
+    """Username from the cache, fetched and remembered when it isn't cached"""
+    user = bot_instance.get_user(user_id)
+    if user:
+        return user.name
+    
+    name = bot_instance.user_names.get(user_id)
+    if name is None:
+        try:
+            name = (await bot_instance.fetch_user(user_id)).name
+        except discord.HTTPException:
+            return f"User {user_id}"
+        bot_instance.user_names.put(user_id, name)
+    return name
+
+def parse_shard_ids(spec: str) -> list:
+    """Parse ``"0-3"`` or ``"0,2,5"`` into a list of shard ids"""
+    shard_ids = []
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        if '-' in part:
+            first, last = part.split('-')
+            shard_ids.extend(range(int(first), int(last) + 1))
+        else:
+            shard_ids.append(int(part))
+    return shard_ids
+
+SHARD_IDS = parse_shard_ids(SHARD_IDS_SPEC)
+
+def shard_options() -> dict:
+    """Keyword arguments for AutoShardedBot, or none when running unsharded"""
+    options = {}
+    if SHARD_COUNT:
+        options['shard_count'] = SHARD_COUNT
+    if SHARD_IDS:
+        options['shard_ids'] = SHARD_IDS
+    return options
+
+def owns_guild(guild_id) -> bool:
+    """Whether this process runs the shard a guild lives on"""
+    if not (SHARD_COUNT and SHARD_IDS):
+        return True
+    return (int(guild_id) >> 22) % SHARD_COUNT in SHARD_IDS
+
+def command_tree_hash(tree, application_id) -> str:
+    """Fingerprint of the command payloads a sync would upload"""
+    commands = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda command: command['name'])
+    encoded = json.dumps([str(application_id), commands], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def user_cooldown():
+    """Per-user cooldown for read-only commands that busy servers spam"""
+    return app_commands.checks.cooldown(COMMAND_COOLDOWN_RATE, COMMAND_COOLDOWN_SECONDS)
+
+def data_file(filename):
+    """Per-cluster data file name, seeded from the shared file on first use"""
+    if CLUSTER_ID is None:
+        return filename
+    
+    base, ext = os.path.splitext(filename)
+    cluster_file = f"{base}.cluster{CLUSTER_ID}{ext}"
+    existing = (cluster_file, f"{cluster_file}.log", f"{base}.cluster{CLUSTER_ID}.sqlite3")
+    if not any(os.path.exists(path) for path in existing):
+        shared = STORAGE_ENGINES[STORAGE_BACKEND](filename)
+        data = shared.load()
+        shared.close()
+        atomic_write_json(cluster_file, {key: value for key, value in data.items() if owns_guild(key)})
+    return cluster_file
+
+# ========================================
+# INVITE TRACKING
+# ========================================
+
+class InviteTracker:
+    """Attributes member joins to the invites they used"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.cache = bot.invite_cache  # {guild_id: {code: {'uses', 'max_uses', 'inviter_id'}}}
+        self.deleted = {}  # {guild_id: {code: (entry, deleted_at)}}
+        self.pending = {}  # {guild_id: [member, ...]}
+        self.batches = {}  # {guild_id: asyncio.Task}
+        self.locks = {}
+        self.fetches = 0
     
     @staticmethod
-    def save(filename, data):
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
+    def snapshot(invites) -> dict:
+        """Build a cache entry from a list of invites"""
+        return {
+            invite.code: {
+                'uses': invite.uses or 0,
+                'max_uses': invite.max_uses or 0,
+                'inviter_id': str(invite.inviter.id) if invite.inviter else None
+            }
+            for invite in invites
+        }
+    
+    def lock(self, guild_id):
+        if guild_id not in self.locks:
+            self.locks[guild_id] = asyncio.Lock()
+        return self.locks[guild_id]
+    
+    async def refresh(self, guild):
+        """Replace the cached snapshot for a guild with a fresh fetch"""
+        async with self.lock(guild.id):
+            invites = await guild.invites()
+            self.fetches += 1
+            self.cache[guild.id] = self.snapshot(invites)
+    
+    def invite_created(self, invite):
+        if invite.guild is None or invite.guild.id not in self.cache:
+            return
+        self.cache[invite.guild.id].update(self.snapshot([invite]))
+    
+    def invite_deleted(self, invite):
+        if invite.guild is None:
+            return
+        entry = self.cache.get(invite.guild.id, {}).pop(invite.code, None)
+        if entry:
+            # One-use invites are deleted as they're used, often before the join is attributed
+            self.deleted.setdefault(invite.guild.id, {})[invite.code] = (entry, time.monotonic())
+    
+    def member_joined(self, member: discord.Member):
+        """Queue a join; the first join of a burst schedules the batch"""
+        guild_id = member.guild.id
+        self.pending.setdefault(guild_id, []).append(member)
+        if guild_id not in self.batches:
+            self.batches[guild_id] = asyncio.create_task(self._attribute_batch(member.guild))
+    
+    async def _attribute_batch(self, guild: discord.Guild):
+        await asyncio.sleep(INVITE_DEBOUNCE_SECONDS)
+        async with self.lock(guild.id):
+            # Joins from here on go into the next batch
+            del self.batches[guild.id]
+            members = self.pending.pop(guild.id, [])
+            
+            try:
+                invites = await guild.invites()
+            except discord.HTTPException as e:
+                print(f"Error tracking invites in {guild.name}: {e}")
+                return
+            self.fetches += 1
+            
+            before = self.cache.get(guild.id)
+            after = self.snapshot(invites)
+            self.cache[guild.id] = after
+            deleted = self.deleted.pop(guild.id, {})
+            if before is None:
+                return  # No baseline to diff against yet
+            
+            credits = self._diff(before, after, deleted)
+            for member in members:
+                if credits:
+                    code, inviter_id = credits.pop(0)
+                    if inviter_id:
+                        self._credit(guild, member, code, inviter_id)
+                elif guild.vanity_url_code:
+                    print(f"ℹ️ {member.name} joined {guild.name} via vanity URL")
+    
+    @staticmethod
+    def _diff(before, after, deleted) -> list:
+        """Return one ``(code, inviter_id)`` credit per detected use"""
+        credits = []
+        for code, entry in after.items():
+            uses_before = before[code]['uses'] if code in before else 0
+            credits.extend([(code, entry['inviter_id'])] * max(entry['uses'] - uses_before, 0))
+        
+        # Invites that disappeared with exactly one use left were used up by a join
+        now = time.monotonic()
+        vanished = {code: entry for code, entry in before.items() if code not in after}
+        vanished.update({
+            code: entry for code, (entry, deleted_at) in deleted.items()
+            if now - deleted_at < DELETED_INVITE_TTL
+        })
+        for code, entry in vanished.items():
+            if entry['max_uses'] and entry['uses'] + 1 == entry['max_uses']:
+                credits.append((code, entry['inviter_id']))
+        return credits
+    
+    def _credit(self, guild, member, code, inviter_id):
+        count = self.bot.invites_db.increment([str(guild.id), inviter_id])
+        self.bot.leaderboards.record(str(guild.id), inviter_id, count)
+        self.bot.invite_history.record_join(str(guild.id), str(member.id), inviter_id, code)
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second, bursting to ``burst``"""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class InviteWarmup:
+    """Fetches invite snapshots for every guild once per process, most recently active first"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.limiter = RateLimiter(WARMUP_RATE)
+        self.snapshot_file = INVITE_SNAPSHOT_FILE if CLUSTER_ID is None else f"invite_snapshot.cluster{CLUSTER_ID}.json"
+        self.last_active = {}  # {guild_id: unix timestamp}
+        self.queue = deque()
+        self.urgent = deque()
+        self.warmed = set()
+        self.failed = {}
+        self.task = None
+        self.started_at = None
+        self.elapsed = None
+        self.total = 0
+    
+    def load_snapshot(self):
+        """Prime the invite cache from the last saved snapshot, if recent"""
+        if not os.path.exists(self.snapshot_file):
+            return
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"Error reading invite snapshot: {e}")
+            return
+        
+        self.last_active = {int(guild_id): ts for guild_id, ts in snapshot.get('last_active', {}).items()}
+        if time.time() - snapshot.get('saved_at', 0) > INVITE_SNAPSHOT_MAX_AGE:
+            return  # Too stale: uses may have moved while we were offline
+        for guild_id, invites in snapshot.get('invites', {}).items():
+            self.bot.invite_cache[int(guild_id)] = invites
+    
+    def snapshot(self) -> dict:
+        """Copy of the invite cache to save; take it on the event loop, which keeps changing the cache"""
+        return {
+            'saved_at': time.time(),
+            'last_active': dict(self.last_active),
+            'invites': {guild_id: dict(invites) for guild_id, invites in self.bot.invite_cache.items()}
+        }
+    
+    def save_snapshot(self, snapshot=None):
+        atomic_write_json(self.snapshot_file, snapshot or self.snapshot())
+    
+    def touch(self, guild_id):
+        """Record guild activity, prioritizing it if it isn't warm yet"""
+        self.last_active[guild_id] = time.time()
+        if self.task is not None and not self.task.done() and guild_id not in self.warmed:
+            self.urgent.append(guild_id)
+    
+    def start(self):
+        """Start warmup; later calls (e.g. after a RESUME) are no-ops"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        self.started_at = time.perf_counter()
+        guilds = sorted(
+            self.bot.guilds,
+            key=lambda g: (-self.last_active.get(g.id, 0), -(g.member_count or 0))
+        )
+        self.queue.extend(guild.id for guild in guilds)
+        self.total = len(guilds)
+        print(f"🔄 Warming invite cache for {self.total} guilds...")
+        
+        workers = [asyncio.create_task(self._worker()) for _ in range(min(WARMUP_CONCURRENCY, self.total))]
+        await asyncio.gather(*workers)
+        
+        self.elapsed = time.perf_counter() - self.started_at
+        print(f"✅ Invite cache warm: {len(self.warmed) - len(self.failed)}/{self.total} guilds in {self.elapsed:.1f}s ({len(self.failed)} failed)")
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.save_snapshot, self.snapshot())
+        except Exception as e:
+            print(f"Error saving invite snapshot: {e}")
+    
+    def _next(self):
+        for queue in (self.urgent, self.queue):
+            while queue:
+                guild_id = queue.popleft()
+                if guild_id not in self.warmed:
+                    return guild_id
+        return None
+    
+    async def _worker(self):
+        while True:
+            guild_id = self._next()
+            if guild_id is None:
+                return
+            
+            # Mark before fetching so no other worker picks it up
+            self.warmed.add(guild_id)
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            
+            await self.limiter.acquire()
+            try:
+                await self.bot.invite_tracker.refresh(guild)
+            except discord.Forbidden:
+                self.failed[guild_id] = "Missing Manage Server permission"
+            except discord.HTTPException as e:
+                self.failed[guild_id] = str(e)
+            
+            done = len(self.warmed)
+            if done % max(self.total // 4, 1) == 0 and done < self.total:
+                print(f"🔄 Invite warmup {done}/{self.total} ({time.perf_counter() - self.started_at:.1f}s)")
+    
+    def stats(self) -> dict:
+        return {
+            'warmed': len(self.warmed) - len(self.failed),
+            'failed': len(self.failed),
+            'total': self.total,
+            'elapsed_s': round(self.elapsed, 2) if self.elapsed is not None else None,
+        }
+
+# ========================================
+# GIVEAWAYS
+# ========================================
+
+def utc_timestamp(iso_time: str) -> float:
+    """Unix timestamp for a naive UTC isoformat string"""
+    return datetime.fromisoformat(iso_time).replace(tzinfo=timezone.utc).timestamp()
+
+class GiveawayStore:
+    """Giveaways keyed by guild id, then message id"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.entrants = {}  # {(guild_id, message_id): set of user ids}, built on first use
+        self.starting = {}  # {guild_id: giveaways posted but not stored yet}
+    
+    @contextlib.contextmanager
+    def start(self, guild_id):
+        """Mark a giveaway as being posted; its message ID is only known once Discord replies"""
+        self.starting[guild_id] = self.starting.get(guild_id, 0) + 1
+        try:
+            yield
+        finally:
+            self.starting[guild_id] -= 1
+            if not self.starting[guild_id]:
+                del self.starting[guild_id]
+    
+    def migrate(self):
+        """Convert the old one-giveaway-per-guild layout"""
+        for guild_id, giveaway in list(self.db.items()):
+            if 'active' not in giveaway:
+                continue
+            message_id = giveaway.get('message_id')
+            if message_id is None:
+                self.db.delete([guild_id])
+                continue
+            entry = {key: value for key, value in giveaway.items() if key != 'message_id'}
+            entry.setdefault('winners', 1)
+            entry.setdefault('winner_ids', [])
+            self.db.set([guild_id], {str(message_id): entry})
+    
+    def load_active(self) -> list:
+        """Migrate, then list every running giveaway; reads every guild, so call it from an executor"""
+        self.migrate()
+        return list(self.all_active())
+    
+    def get(self, guild_id, message_id):
+        return self.db.get_path([guild_id, message_id])
+    
+    def all_active(self):
+        """Yield ``(guild_id, message_id, giveaway)`` for every running giveaway"""
+        for guild_id, giveaways in self.db.items():
+            for message_id, giveaway in giveaways.items():
+                if giveaway.get('active'):
+                    yield guild_id, message_id, giveaway
+    
+    def latest_active(self, guild_id):
+        """Message id of the most recently started running giveaway in a guild"""
+        active = [
+            message_id for message_id, giveaway in self.db.get(guild_id, {}).items()
+            if giveaway.get('active')
+        ]
+        return max(active, key=int) if active else None
+    
+    def create(self, guild_id, message_id, giveaway):
+        self.db.set([guild_id, message_id], giveaway)
+        self.entrants[(guild_id, message_id)] = set()
+    
+    def has_entered(self, guild_id, message_id, user_id) -> bool:
+        return user_id in self._entrants(guild_id, message_id)
+    
+    def add_entrant(self, guild_id, message_id, user_id):
+        self._entrants(guild_id, message_id).add(user_id)
+        self.db.append([guild_id, message_id, 'participants'], user_id)
+    
+    def _entrants(self, guild_id, message_id):
+        key = (guild_id, message_id)
+        if key not in self.entrants:
+            self.entrants[key] = set(self.get(guild_id, message_id)['participants'])
+        return self.entrants[key]
+    
+    def draw(self, guild_id, message_id, count, exclude=()) -> list:
+        """Pick up to ``count`` distinct winners not in ``exclude``"""
+        participants = self.get(guild_id, message_id)['participants']
+        excluded = set(exclude) & self._entrants(guild_id, message_id)
+        count = min(count, len(participants) - len(excluded))
+        
+        if (len(excluded) + count) * 2 > len(participants):
+            candidates = [user_id for user_id in participants if user_id not in excluded]
+            return random.sample(candidates, count)
+        
+        winners = []
+        while len(winners) < count:
+            user_id = random.choice(participants)
+            if user_id not in excluded:
+                excluded.add(user_id)
+                winners.append(user_id)
+        return winners
+    
+    def finish(self, guild_id, message_id, winner_ids):
+        self.db.set([guild_id, message_id, 'active'], False)
+        self.db.set([guild_id, message_id, 'winner_ids'], winner_ids)
+    
+    def add_winners(self, guild_id, message_id, winner_ids):
+        previous = self.get(guild_id, message_id).get('winner_ids', [])
+        self.db.set([guild_id, message_id, 'winner_ids'], previous + winner_ids)
+
+class GiveawayJoinQueue:
+    """Processes giveaway button clicks in batches"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = deque()
+        self.wakeup = None
+        self.task = None
+        self.batches = 0
+        self.processed = 0
+    
+    def start(self):
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    def submit(self, interaction: discord.Interaction, guild_id, message_id):
+        self.queue.append((interaction, guild_id, message_id))
+        self.wakeup.set()
+    
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            # Give a burst a moment to build up into one batch
+            await asyncio.sleep(JOIN_BATCH_WAIT_MS / 1000)
+            self.wakeup.clear()
+            
+            while self.queue:
+                batch = [self.queue.popleft() for _ in range(min(JOIN_BATCH_SIZE, len(self.queue)))]
+                try:
+                    results = self.process(batch)
+                    await self.bot.flusher.flush()
+                except Exception as e:
+                    print(f"Error processing giveaway joins: {e}")
+                    results = [(interaction, "❌ Something went wrong, please try again!") for interaction, _, _ in batch]
+                
+                self.batches += 1
+                self.processed += len(batch)
+                await asyncio.gather(*(self._reply(interaction, message) for interaction, message in results))
+    
+    def process(self, batch) -> list:
+        """Validate and record a batch of clicks, returning ``(interaction, reply)`` pairs"""
+        giveaways = self.bot.giveaways
+        results = []
+        for interaction, guild_id, message_id in batch:
+            user_id = str(interaction.user.id)
+            giveaway = giveaways.get(guild_id, message_id)
+            
+            if not giveaway or not giveaway.get('active'):
+                results.append((interaction, "❌ This giveaway is no longer active!"))
+                continue
+            
+            # Also catches double clicks within the same batch
+            if giveaways.has_entered(guild_id, message_id, user_id):
+                results.append((interaction, "❌ You're already participating!"))
+                continue
+            
+            # Check minimum invites; windowed giveaways only count invites that stayed
+            min_invites = giveaway.get('min_invites', 0)
+            window = giveaway.get('invite_window')
+            if window:
+                user_invites = self.bot.invite_history.real(guild_id, user_id, window)
+            else:
+                user_invites = self.bot.invites_db.get(guild_id, {}).get(user_id, 0)
+            if user_invites < min_invites:
+                period = f" in the last {window} days" if window else ""
+                results.append((interaction, f"❌ You need at least {min_invites} invites{period} to participate! (You have {user_invites})"))
+                continue
+            
+            # Check required role
+            required_role_id = giveaway.get('required_role_id')
+            if required_role_id:
+                role = interaction.guild.get_role(required_role_id)
+                if role and role not in interaction.user.roles:
+                    results.append((interaction, f"❌ You need the {role.mention} role to participate!"))
+                    continue
+            
+            giveaways.add_entrant(guild_id, message_id, user_id)
+            results.append((interaction, "✅ You've joined the giveaway! Good luck!"))
+        return results
+    
+    async def _reply(self, interaction, message):
+        try:
+            await interaction.followup.send(message, ephemeral=True)
+        except discord.HTTPException as e:
+            print(f"Error replying to giveaway join: {e}")
+
+class GiveawayScheduler:
+    """Ends giveaways on time from a single sleeping task"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.heap = []  # [(end_timestamp, key)]
+        self.deadlines = {}  # {key: end_timestamp} for live entries
+        self.wakeup = None
+        self.task = None
+    
+    def schedule(self, key, end_timestamp):
+        self.deadlines[key] = end_timestamp
+        heapq.heappush(self.heap, (end_timestamp, key))
+        if self.wakeup is not None:
+            self.wakeup.set()  # The new deadline may be the earliest
+    
+    def cancel(self, key):
+        self.deadlines.pop(key, None)
+    
+    def rehydrate(self, active):
+        """Schedule the ``(guild_id, message_id, giveaway)`` entries from ``GiveawayStore.load_active``"""
+        for guild_id, message_id, giveaway in active:
+            self.schedule((guild_id, message_id), utc_timestamp(giveaway['end_time']))
+    
+    def start(self):
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        # Giveaways that ended while offline need the guild cache
+        await self.bot.wait_until_ready()
+        while True:
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                end_timestamp, key = heapq.heappop(self.heap)
+                if self.deadlines.get(key) != end_timestamp:
+                    continue  # Cancelled or rescheduled
+                del self.deadlines[key]
+                try:
+                    await self._fire(key)
+                except Exception as e:
+                    print(f"Error ending giveaway {key}: {e}")
+            
+            self.wakeup.clear()
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _fire(self, key):
+        guild_id, message_id = key
+        guild = self.bot.get_guild(int(guild_id))
+        if guild:
+            await end_giveaway(guild, message_id)
+
+class Leaderboard:
+    """Invite counts for one guild, kept ranked as they change"""
+    
+    def __init__(self, counts=None):
+        self.scores = {}  # {user_id: count}
+        self.buckets = {}  # {count: {user_id: None}} in arrival order
+        self.levels = []  # Distinct counts, ascending
+        self.top_version = 0
+        self.revision = 0
+        for user_id, count in (counts or {}).items():
+            self._place(user_id, count)
+    
+    def __len__(self):
+        return len(self.scores)
+    
+    def _place(self, user_id, count):
+        self.scores[user_id] = count
+        if count not in self.buckets:
+            self.buckets[count] = {}
+            bisect.insort(self.levels, count)
+        self.buckets[count][user_id] = None
+    
+    def _remove(self, user_id):
+        count = self.scores.pop(user_id)
+        bucket = self.buckets[count]
+        del bucket[user_id]
+        if not bucket:
+            del self.buckets[count]
+            del self.levels[bisect.bisect_left(self.levels, count)]
+    
+    def update(self, user_id, count):
+        top_before = self.top(10)
+        if user_id in self.scores:
+            self._remove(user_id)
+        self._place(user_id, count)
+        
+        self.revision += 1
+        if self.top(10) != top_before:
+            self.top_version += 1
+    
+    def top(self, k, offset=0) -> list:
+        """Return up to ``k`` ``(user_id, count)`` pairs starting at rank ``offset``"""
+        entries = []
+        for count in reversed(self.levels):
+            bucket = self.buckets[count]
+            if offset >= len(bucket):
+                offset -= len(bucket)
+                continue
+            for user_id in itertools.islice(bucket, offset, None):
+                entries.append((user_id, count))
+                if len(entries) == k:
+                    return entries
+            offset = 0
+        return entries
+
+class InviteLeaderboards:
+    """Per-guild leaderboards built on first use and updated on every credit"""
+    
+    def __init__(self, db, embeds):
+        self.db = db
+        self.boards = {}
+        self.embeds = embeds
+    
+    def get(self, guild_id) -> Leaderboard:
+        if guild_id not in self.boards:
+            self.boards[guild_id] = Leaderboard(self.db.get(guild_id, {}))
+        return self.boards[guild_id]
+    
+    def record(self, guild_id, user_id, count):
+        # Unbuilt boards pick up the new count from the database when built
+        if guild_id in self.boards:
+            self.boards[guild_id].update(user_id, count)
+    
+    def cached_embed(self, guild_id, page):
+        """Return the cached embed for a page if the ranks it shows are unchanged"""
+        return self.embeds.get(guild_id, ('topinvites', page), self._version(guild_id, page))
+    
+    def cache_embed(self, guild_id, page, embed):
+        self.embeds.put(guild_id, ('topinvites', page), self._version(guild_id, page), embed)
+    
+    def _version(self, guild_id, page):
+        board = self.get(guild_id)
+        return board.top_version if page == 1 else board.revision
+
+class InviteHistory:
+    """Daily join and leave counters per inviter, for windowed invite counts"""
+    
+    def __init__(self, db, totals, days=None):
+        self.db = db
+        self.totals = totals
+        self.days = days or INVITE_HISTORY_DAYS
+    
+    @staticmethod
+    def today() -> int:
+        return int(time.time() // 86400)
+    
+    def _counters(self, guild_id, inviter_id, today):
+        """A copy of an inviter's counters, with buckets for days since the last write cleared"""
+        stored = self.db.get_path([guild_id, 'inviters', inviter_id])
+        if stored is None:
+            return {'day': today, 'joins': [0] * self.days, 'leaves': [0] * self.days, 'left': 0}
+        
+        counters = {**stored, 'joins': list(stored['joins']), 'leaves': list(stored['leaves'])}
+        for day in range(max(counters['day'] + 1, today - self.days + 1), today + 1):
+            counters['joins'][day % self.days] = 0
+            counters['leaves'][day % self.days] = 0
+        counters['day'] = max(counters['day'], today)
+        return counters
+    
+    def record_join(self, guild_id, member_id, inviter_id, code):
+        today = self.today()
+        counters = self._counters(guild_id, inviter_id, today)
+        counters['joins'][today % self.days] += 1
+        self.db.set([guild_id, 'inviters', inviter_id], counters)
+        self.db.set([guild_id, 'members', member_id], {'inviter': inviter_id, 'code': code, 'day': today, 'left': False})
+    
+    def record_leave(self, guild_id, member_id):
+        record = self.db.get_path([guild_id, 'members', member_id])
+        if record is None or record['left']:
+            return
+        
+        today = self.today()
+        counters = self._counters(guild_id, record['inviter'], today)
+        if today - record['day'] < self.days:
+            counters['leaves'][record['day'] % self.days] += 1
+        counters['left'] += 1
+        self.db.set([guild_id, 'inviters', record['inviter']], counters)
+        self.db.set([guild_id, 'members', member_id, 'left'], True)
+    
+    def counts(self, guild_id, inviter_id, days=None) -> tuple:
+        """``(joins, leaves)`` credited in the last ``days`` days, or ever when ``days`` is None"""
+        counters = self.db.get_path([guild_id, 'inviters', inviter_id])
+        if days is None:
+            return self.totals.get_path([guild_id, inviter_id], 0), counters['left'] if counters else 0
+        if counters is None:
+            return 0, 0
+        
+        # Buckets after the last write are stale; ones before the ring are gone
+        today = self.today()
+        last = min(counters['day'], today)
+        joins = leaves = 0
+        for day in range(max(today - min(days, self.days) + 1, counters['day'] - self.days + 1), last + 1):
+            joins += counters['joins'][day % self.days]
+            leaves += counters['leaves'][day % self.days]
+        return joins, leaves
+    
+    def real(self, guild_id, inviter_id, days=None) -> int:
+        """Invites that didn't leave again"""
+        joins, leaves = self.counts(guild_id, inviter_id, days)
+        return max(joins - leaves, 0)
+
+# ========================================
+# WARNINGS
+# ========================================
+
+def parse_duration(duration: str) -> int:
+    """Parse a duration like 10m, 1h or 2d into seconds"""
+    time_units = {'m': 60, 'h': 3600, 'd': 86400}
+    unit = duration[-1]
+    amount = int(duration[:-1])
+    return amount * time_units.get(unit, 60)
+
+def format_seconds(seconds: int) -> str:
+    """Format seconds in the largest whole unit, e.g. 86400 -> 1d"""
+    for suffix, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{suffix}"
+    return f"{seconds}s"
+
+def parse_escalation(rules: str) -> list:
+    """Parse rules like ``3/24h=1h,5/7d=1d`` into ``(count, window, timeout)`` tuples, longest timeout first"""
+    parsed = []
+    for rule in filter(None, (part.strip() for part in rules.split(','))):
+        threshold, timeout = rule.split('=')
+        count, window = threshold.split('/')
+        parsed.append((int(count), parse_duration(window.strip()), parse_duration(timeout.strip())))
+    return sorted(parsed, key=lambda rule: (rule[2], rule[0]), reverse=True)
+
+class WarningStore:
+    """Warnings with a time-ordered index per user and per guild; expired ones stop counting but are kept"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.ttl = WARN_TTL_DAYS * 86400
+        self.indexes = {}  # {guild_id: {'users': {user_id: [timestamps]}, 'all': [timestamps]}}
+    
+    def _index(self, guild_id):
+        if guild_id not in self.indexes:
+            users = {
+                user_id: [utc_timestamp(warning['timestamp']) for warning in warnings]
+                for user_id, warnings in self.db.get(guild_id, {}).items()
+            }
+            self.indexes[guild_id] = {
+                'users': users,
+                'all': sorted(itertools.chain.from_iterable(users.values()))
+            }
+        return self.indexes[guild_id]
+    
+    def _cutoff(self):
+        return time.time() - self.ttl if self.ttl else 0
+    
+    def _expired(self, guild_id, user_id) -> int:
+        """How many of the user's warnings (the oldest ones) are past ``WARN_TTL_DAYS``"""
+        stamps = self._index(guild_id)['users'].get(user_id, [])
+        return bisect.bisect_left(stamps, self._cutoff())
+    
+    def add(self, guild_id, user_id, reason, moderator_id) -> dict:
+        warning = {
+            "reason": reason,
+            "moderator": moderator_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        self.db.append([guild_id, user_id], warning)
+        
+        timestamp = utc_timestamp(warning['timestamp'])
+        index = self._index(guild_id)
+        index['users'].setdefault(user_id, []).append(timestamp)
+        bisect.insort(index['all'], timestamp)
+        return warning
+    
+    def active(self, guild_id, user_id) -> list:
+        """Active warnings for a user, oldest first"""
+        return self.db.get(guild_id, {}).get(user_id, [])[self._expired(guild_id, user_id):]
+    
+    def count(self, guild_id, user_id, window=None) -> int:
+        """Active warnings for a user, optionally only those in the last ``window`` seconds"""
+        stamps = self._index(guild_id)['users'].get(user_id, [])
+        return len(stamps) - bisect.bisect_left(stamps, self._since(window))
+    
+    def guild_count(self, guild_id, window=None) -> int:
+        stamps = self._index(guild_id)['all']
+        return len(stamps) - bisect.bisect_left(stamps, self._since(window))
+    
+    def warned_users(self, guild_id) -> int:
+        cutoff = self._cutoff()
+        return sum(1 for stamps in self._index(guild_id)['users'].values() if stamps[-1] >= cutoff)
+    
+    def _since(self, window):
+        cutoff = self._cutoff()
+        return max(cutoff, time.time() - window) if window else cutoff
+    
+    def clear(self, guild_id, user_id, number=None) -> int:
+        """Remove one active warning (1-based, oldest first) or all of them; returns how many"""
+        warnings = self.db.get(guild_id, {}).get(user_id, [])
+        expired = self._expired(guild_id, user_id)
+        if number is None:
+            removed = list(range(expired, len(warnings)))
+        elif 1 <= number <= len(warnings) - expired:
+            removed = [expired + number - 1]
+        else:
+            return 0
+        
+        index = self._index(guild_id)
+        stamps = index['users'].get(user_id, [])
+        for position in reversed(removed):
+            timestamp = stamps.pop(position)
+            index['all'].pop(bisect.bisect_left(index['all'], timestamp))
+        
+        if stamps:
+            self.db.set([guild_id, user_id], [w for i, w in enumerate(warnings) if i not in removed])
+        elif removed:
+            index['users'].pop(user_id, None)
+            self.db.delete([guild_id, user_id])
+        return len(removed)
+    
+    def escalation_for(self, guild_id, user_id, rules):
+        """Return the matched rule with the longest timeout, if any (``rules`` as from ``parse_escalation``)"""
+        for rule in rules:
+            count, window, _ = rule
+            if self.count(guild_id, user_id, window) >= count:
+                return rule
+        return None
+
+# ========================================
+# SERVER SETTINGS
+# ========================================
+
+# Settings a guild can change with /config; the env values are the defaults
+GUILD_CONFIG_DEFAULTS = {
+    'auto_role_id': AUTO_ROLE_ID,
+    'log_channel_id': None,
+    'warn_escalation': WARN_ESCALATION,
+    'giveaway_winners': 1,
+    'giveaway_min_invites': 0,
+    'giveaway_role_id': None
+}
+
+class GuildConfig:
+    """Per-guild settings layered over GUILD_CONFIG_DEFAULTS"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.versions = {}  # {guild_id: version}
+        self.cache = {}  # {guild_id: (version, settings)}
+    
+    def get(self, guild_id) -> dict:
+        guild_id = str(guild_id)
+        version = self.versions.get(guild_id, 0)
+        cached = self.cache.get(guild_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        settings = {**GUILD_CONFIG_DEFAULTS, **self.db.get(guild_id, {})}
+        try:
+            settings['escalation_rules'] = parse_escalation(settings['warn_escalation'] or '')
+        except (ValueError, IndexError):
+            settings['escalation_rules'] = parse_escalation(WARN_ESCALATION)
+        self.cache[guild_id] = (version, settings)
+        return settings
+    
+    def overrides(self, guild_id) -> dict:
+        """Settings this guild changed from the defaults"""
+        return self.db.get(str(guild_id), {})
+    
+    def set(self, guild_id, key, value):
+        if key not in GUILD_CONFIG_DEFAULTS:
+            raise KeyError(key)
+        guild_id = str(guild_id)
+        self.db.set([guild_id, key], value)
+        self._invalidate(guild_id)
+    
+    def reset(self, guild_id, key):
+        """Go back to the default for one setting"""
+        guild_id = str(guild_id)
+        if key in self.overrides(guild_id):
+            self.db.delete([guild_id, key])
+            self._invalidate(guild_id)
+    
+    def _invalidate(self, guild_id):
+        self.versions[guild_id] = self.versions.get(guild_id, 0) + 1
+
+# ========================================
+# AUTO-ROLE
+# ========================================
+
+class AutoRoleQueue:
+    """Assigns the auto-role to new members from a small worker pool"""
+    
+    def __init__(self, bot, workers=None):
+        self.bot = bot
+        self.worker_count = workers or AUTO_ROLE_WORKERS
+        self.queue = None
+        self.workers = []
+        self.pending = {}  # {(guild_id, member_id): enqueued_at}
+        self.limiters = {}
+        
+        # Metrics (time from join to role is the auto_role_seconds histogram)
+        self.assigned = 0
+        self.failed = 0
+        self.skipped = 0
+    
+    def start(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+    
+    def submit(self, member: discord.Member, role_id: int):
+        key = (member.guild.id, member.id)
+        if key in self.pending:
+            return  # Already queued (e.g. a duplicate join event)
+        self.pending[key] = time.monotonic()
+        self.queue.put_nowait((member, role_id, 0))
+    
+    def member_left(self, guild_id, user_id):
+        # The worker skips members that are no longer pending
+        self.pending.pop((guild_id, user_id), None)
+    
+    def _limiter(self, guild_id):
+        if guild_id not in self.limiters:
+            self.limiters[guild_id] = RateLimiter(AUTO_ROLE_RATE)
+        return self.limiters[guild_id]
+    
+    async def _worker(self):
+        while True:
+            member, role_id, attempt = await self.queue.get()
+            key = (member.guild.id, member.id)
+            if key not in self.pending:
+                self.skipped += 1
+                continue
+            try:
+                done = await self._assign(member, role_id, attempt)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error assigning auto-role: {e}")
+                done = True
+            if done:
+                self.pending.pop(key, None)
+    
+    async def _assign(self, member: discord.Member, role_id: int, attempt: int) -> bool:
+        """Try one assignment; returns False if a retry was scheduled instead"""
+        role = member.guild.get_role(role_id)
+        if role is None:
+            self.skipped += 1
+            return True
+        
+        await self._limiter(member.guild.id).acquire()
+        key = (member.guild.id, member.id)
+        if key not in self.pending:
+            self.skipped += 1  # Left while we waited
+            return True
+        
+        try:
+            await member.add_roles(role, reason="Auto-role")
+        except discord.NotFound:
+            self.skipped += 1
+            return True
+        except discord.HTTPException as e:
+            if (e.status == 429 or e.status >= 500) and attempt < AUTO_ROLE_RETRIES:
+                # Requeue after a backoff instead of holding a worker
+                delay = min(2 ** attempt, 30) + random.random()
+                asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, (member, role_id, attempt + 1))
+                return False
+            raise
+        
+        self.assigned += 1
+        metrics.observe('auto_role_seconds', time.monotonic() - self.pending[key])
+        return True
+    
+    def stats(self) -> dict:
+        hist = metrics.series('auto_role_seconds').get(())
+        samples = [seconds * 1000 for seconds in hist.recent] if hist else []
+        return {
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'pending': len(self.pending),
+            'assigned': self.assigned,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'time_to_role_p50_ms': round(percentile(samples, 50), 1) if samples else None,
+            'time_to_role_p99_ms': round(percentile(samples, 99), 1) if samples else None,
+        }
+
+# ========================================
+# PURGE
+# ========================================
+
+class PurgeJob:
+    """Deletes matching messages from a channel's history"""
+    
+    def __init__(self, channel, amount, check=None, before=None, after=None, progress=None):
+        self.channel = channel
+        self.amount = amount
+        self.check = check or (lambda message: True)
+        self.before = before
+        self.after = after
+        self.progress = progress  # Async callback(job), called every few seconds
+        self.limiter = RateLimiter(PURGE_SINGLE_RATE)
+        
+        self.scanned = 0
+        self.matched = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+    
+    @property
+    def deleted(self):
+        return self.bulk_deleted + self.single_deleted
+    
+    async def run(self):
+        # A small buffer lets history paging and deletes overlap
+        batches = asyncio.Queue(maxsize=2)
+        deleter = asyncio.create_task(self._delete_batches(batches))
+        
+        # Stay a minute inside the bulk-delete window so requests don't race the cutoff
+        cutoff = discord.utils.utcnow() - timedelta(days=14) + timedelta(minutes=1)
+        batch, old = [], []
+        try:
+            async for message in self.channel.history(limit=PURGE_SCAN_LIMIT, before=self.before, after=self.after):
+                self.scanned += 1
+                if not self.check(message):
+                    continue
+                self.matched += 1
+                
+                if message.created_at > cutoff:
+                    batch.append(message)
+                    if len(batch) == 100:
+                        await batches.put(('bulk', batch))
+                        batch = []
+                else:
+                    old.append(message)
+                    if len(old) == 100:
+                        await batches.put(('single', old))
+                        old = []
+                
+                if self.matched >= self.amount:
+                    break
+            
+            if batch:
+                await batches.put(('bulk', batch))
+            if old:
+                await batches.put(('single', old))
+        finally:
+            await batches.put(None)
+            await deleter
+    
+    async def _delete_batches(self, batches):
+        last_report = time.monotonic()
+        while True:
+            item = await batches.get()
+            if item is None:
+                return
+            
+            kind, messages = item
+            if kind == 'bulk':
+                try:
+                    await self.channel.delete_messages(messages)
+                    self.bulk_deleted += len(messages)
+                except discord.HTTPException as e:
+                    self.failed += len(messages)
+                    print(f"Error bulk deleting messages: {e}")
+            else:
+                for message in messages:
+                    await self.limiter.acquire()
+                    try:
+                        await message.delete()
+                        self.single_deleted += 1
+                    except discord.NotFound:
+                        pass  # Already gone
+                    except discord.HTTPException as e:
+                        self.failed += 1
+                        print(f"Error deleting message: {e}")
+            
+            if self.progress and time.monotonic() - last_report >= PURGE_PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                try:
+                    await self.progress(self)
+                except discord.HTTPException:
+                    self.progress = None  # Usually an expired interaction token; stop reporting
+
+# ========================================
+# MASS MODERATION
+# ========================================
+
+class JoinIndex:
+    """Members of each guild ordered by join time"""
+    
+    def __init__(self):
+        self.guilds = {}  # {guild_id: sorted [(joined_at, member_id)]}
+        self.joined = {}  # {(guild_id, member_id): joined_at}
+    
+    @staticmethod
+    def _timestamp(member) -> float:
+        return member.joined_at.timestamp() if member.joined_at else time.time()
+    
+    def _entries(self, guild) -> list:
+        entries = self.guilds.get(guild.id)
+        if entries is None:
+            entries = sorted((self._timestamp(member), member.id) for member in guild.members)
+            self.guilds[guild.id] = entries
+            for joined_at, member_id in entries:
+                self.joined[(guild.id, member_id)] = joined_at
+        return entries
+    
+    def add(self, member: discord.Member):
+        entries = self._entries(member.guild)
+        key = (member.guild.id, member.id)
+        if key in self.joined:
+            return
+        joined_at = self._timestamp(member)
+        self.joined[key] = joined_at
+        bisect.insort(entries, (joined_at, member.id))
+    
+    def remove(self, guild_id, member_id):
+        joined_at = self.joined.pop((guild_id, member_id), None)
+        entries = self.guilds.get(guild_id)
+        if joined_at is None or entries is None:
+            return
+        i = bisect.bisect_left(entries, (joined_at, member_id))
+        if i < len(entries) and entries[i] == (joined_at, member_id):
+            del entries[i]
+    
+    def joined_since(self, guild, seconds) -> list:
+        """IDs of members who joined in the last ``seconds``, oldest first"""
+        entries = self._entries(guild)
+        i = bisect.bisect_left(entries, (time.time() - seconds,))
+        return [member_id for _, member_id in entries[i:]]
+
+class MassModeration:
+    """Runs one moderation action against many users"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.limiters = {}
+    
+    def _limiter(self, guild_id):
+        if guild_id not in self.limiters:
+            self.limiters[guild_id] = RateLimiter(MASS_ACTION_RATE)
+        return self.limiters[guild_id]
+    
+    async def resolve(self, guild, moderator, user_ids, allow_absent=False):
+        """Split user IDs into actionable targets and per-user results for the rest"""
+        semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+        targets, results = [], {}
+        
+        async def check(user_id):
+            if user_id in (moderator.id, self.bot.user.id):
+                results[user_id] = (False, "can't target yourself or the bot")
+                return
+            async with semaphore:
+                member = await get_or_fetch_member(guild, user_id)
+            if member is None:
+                if allow_absent:
+                    targets.append(discord.Object(id=user_id))
+                else:
+                    results[user_id] = (False, "not in the server")
+            elif member.top_role >= moderator.top_role:
+                results[user_id] = (False, "role hierarchy")
+            else:
+                targets.append(member)
+        
+        await asyncio.gather(*(check(user_id) for user_id in user_ids))
+        return targets, results
+    
+    async def run(self, guild, targets, action) -> dict:
+        """Await ``action(target)`` for every target; returns {user_id: (ok, detail)}"""
+        semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+        limiter = self._limiter(guild.id)
+        results = {}
+        
+        async def apply(target):
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    await action(target)
+                    results[target.id] = (True, "done")
+                except discord.NotFound:
+                    results[target.id] = (False, "not in the server")
+                except discord.Forbidden:
+                    results[target.id] = (False, "missing permissions")
+                except discord.HTTPException as e:
+                    results[target.id] = (False, f"error {e.status}")
+        
+        await asyncio.gather(*(apply(target) for target in targets))
+        return results
+    
+    async def ban(self, guild, targets, reason) -> dict:
+        results = {}
+        for i in range(0, len(targets), 200):
+            chunk = targets[i:i + 200]
+            await self._limiter(guild.id).acquire()
+            try:
+                outcome = await guild.bulk_ban(chunk, reason=reason)
+            except discord.Forbidden:
+                results.update((target.id, (False, "missing permissions")) for target in chunk)
+                continue
+            except discord.HTTPException as e:
+                results.update((target.id, (False, f"error {e.status}")) for target in chunk)
+                continue
+            results.update((user.id, (True, "done")) for user in outcome.banned)
+            results.update((user.id, (False, "ban failed")) for user in outcome.failed)
+        return results
 
 class LicenseVerification:
     """Handles license key verification with license bot"""
@@ -66,136 +2250,304 @@ class LicenseVerification:
             print(f"❌ License verification error: {e}")
             return {"status": "error", "message": str(e)}
 
-class DiscordBot(commands.Bot):
+class LicenseManager:
+    """License status cached in memory and revalidated in the background"""
+    
+    def __init__(self, bot, filename=None):
+        self.bot = bot
+        self.filename = filename or LICENSE_FILE
+        self.status = None  # 'active', 'pending', 'expired' or 'revoked'; None before the first check
+        self.user = None
+        self.expiry = None  # Naive UTC datetime
+        self.task = None
+        self.expiry_timer = None
+    
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+            self.expiry_timer = None
+    
+    async def _run(self):
+        print("🔍 Verifying license...")
+        while True:
+            await self.revalidate()
+            await asyncio.sleep(LICENSE_REVALIDATE_SECONDS)
+    
+    async def revalidate(self):
+        """Re-read the license file; keeps the cached status if that fails"""
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(None, self._read)
+        except Exception as e:
+            print(f"❌ Error reading license file: {e}")
+            return
+        self._apply(data)
+    
+    def _read(self):
+        """Blocking file access; returns None after creating a template for first-time setup"""
+        if os.path.exists(self.filename):
+            return read_json(self.filename)
+        
+        write_json(self.filename, {
+            "key": LICENSE_KEY,
+            "status": "pending",
+            "user": "Not Verified",
+            "message": "Please verify license with license bot"
+        })
+        return None
+    
+    def _apply(self, data):
+        previous = self.status
+        if data is not None and data.get('key') == LICENSE_KEY and data.get('status') == 'active':
+            self.status = 'active'
+            self.user = data.get('user', 'Unknown')
+            self.expiry = datetime.fromisoformat(data['expiry_date']) if data.get('expiry_date') else None
+        elif data is not None and data.get('status') == 'revoked':
+            self.status = 'revoked'
+        else:
+            self.status = 'pending'
+            self.expiry = None
+        
+        if self.status == 'revoked':
+            print("❌ LICENSE REVOKED! Bot cannot start.")
+            print(f"❌ Reason: License has been revoked")
+            self._shutdown()
+            return
+        
+        self._schedule_expiry()
+        if self.status == previous:
+            return  # Only log changes
+        if self.status == 'active':
+            print("✅ License verified successfully!")
+            print(f"✅ Licensed to: {self.user}")
+        else:
+            print("⚠️  License not verified yet. Please verify your license with the license bot using:")
+            print(f"⚠️  /verify {LICENSE_KEY}")
+            print(f"⚠️  Then update {self.filename} manually or contact administrator")
+            print("⚠️  Bot will continue running but some features may be limited")
+    
+    def _schedule_expiry(self):
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+            self.expiry_timer = None
+        if self.status != 'active' or self.expiry is None:
+            return
+        
+        delay = (self.expiry - datetime.utcnow()).total_seconds()
+        if delay <= 0:
+            self._expire()
+        else:
+            self.expiry_timer = asyncio.get_running_loop().call_later(delay, self._expire)
+    
+    def _expire(self):
+        self.expiry_timer = None
+        self.status = 'expired'
+        print("❌ LICENSE EXPIRED! Bot shutting down...")
+        self._shutdown()
+    
+    def _shutdown(self):
+        self.stop()
+        asyncio.ensure_future(self.bot.close())
+
+class DiscordBot(commands.AutoShardedBot if SHARDED else commands.Bot):
     def __init__(self):
-        intents = discord.Intents.all()
-        super().__init__(command_prefix='!', intents=intents)
+        intents = bot_intents()
+        super().__init__(
+            command_prefix='!', intents=intents, tree_cls=TimedCommandTree,
+            http_trace=metrics.http_trace(), **shard_options(), **cache_options()
+        )
         
-        # Load databases
-        self.invites_db = Database.load(INVITES_DB)
-        self.giveaway_db = Database.load(GIVEAWAY_DB)
-        self.warnings_db = Database.load(WARNINGS_DB)
+        # Load databases (only this worker's guilds when sharded across processes)
+        self.invites_db = Database(data_file(INVITES_DB), owns=owns_guild)
+        self.invite_history_db = Database(data_file(INVITE_HISTORY_DB), owns=owns_guild)
+        self.giveaway_db = Database(data_file(GIVEAWAY_DB), owns=owns_guild)
+        self.warnings_db = Database(data_file(WARNINGS_DB), owns=owns_guild)
+        self.config_db = Database(data_file(CONFIG_DB), owns=owns_guild)
+        self.warnings = WarningStore(self.warnings_db)
+        self.guild_config = GuildConfig(self.config_db)
+        self.flusher = WriteBehindFlusher([
+            self.invites_db, self.invite_history_db, self.giveaway_db, self.warnings_db, self.config_db
+        ])
+        self.giveaways = GiveawayStore(self.giveaway_db)
+        self.giveaway_scheduler = GiveawayScheduler(self)
+        self.giveaway_joins = GiveawayJoinQueue(self)
+        self.auto_roles = AutoRoleQueue(self)
+        self.join_index = JoinIndex()
+        self.mass_moderation = MassModeration(self)
         
         # Store invite snapshots
         self.invite_cache = {}
+        self.invite_tracker = InviteTracker(self)
+        self.embeds = EmbedCache()
+        self.leaderboards = InviteLeaderboards(self.invites_db, self.embeds)
+        self.invite_history = InviteHistory(self.invite_history_db, self.invites_db)
+        self.warmup = InviteWarmup(self)
         
-        # License verification flag
-        self.license_verified = False
+        # License status, checked in the background
+        self.license = LicenseManager(self)
         
-    async def setup_hook(self):
-        """Setup hook called when bot starts"""
-        await self.tree.sync()
-        print("✅ Commands synced")
-    
-    async def on_ready(self):
-        """Called when bot is ready"""
-        print(f'✅ Bot logged in as {self.user}')
-        print(f'✅ Bot ID: {self.user.id}')
+        # Usernames fetched for users that aren't cached
+        self.user_names = LRUCache(USER_NAME_CACHE_SIZE)
         
-        # Verify license on startup
-        if not self.license_verified:
-            await self.verify_license_status()
+        self.watchdog = LoopWatchdog(strict_ms=WATCHDOG_STRICT_MS)
         
-        # Cache invites for all guilds
-        for guild in self.guilds:
-            try:
-                invites = await guild.invites()
-                self.invite_cache[guild.id] = {invite.code: invite.uses for invite in invites}
-            except:
-                pass
+        # Startup timings, in seconds since the process started
+        self.startup = {}
+        self.shutdown = None  # Task flushing and closing storage, once close() starts
+        metrics.gauge('startup_seconds', lambda: self.startup.get('ready', 0))
+        
+        # Queue depths, read whenever metrics are rendered
+        metrics.gauge('auto_role_queue_depth', lambda: self.auto_roles.stats()['queue_depth'])
+        metrics.gauge('giveaway_join_queue_depth', lambda: len(self.giveaway_joins.queue))
+        metrics.gauge('giveaway_timers', lambda: len(self.giveaway_scheduler.deadlines))
+        metrics.gauge('invite_joins_pending', lambda: sum(len(members) for members in self.invite_tracker.pending.values()))
+        metrics.gauge('db_writes_pending', lambda: self.flusher.stats()['pending'])
+        metrics.gauge('embed_cache_entries', lambda: len(self.embeds.entries))
+        metrics.gauge('guilds', lambda: len(self.guilds))
+        metrics.gauge('gateway_latency_seconds', lambda: self.latency)
     
-    async def verify_license_status(self):
-        """Verify license and shut down if invalid"""
-        print("🔍 Verifying license...")
+    async def close(self):
+        """Flush pending writes and close storage, then the gateway connection"""
+        if self.is_closed():
+            return
+        if self.shutdown is None:
+            # Concurrent close() calls wait on the same shutdown
+            self.shutdown = asyncio.ensure_future(self.close_storage())
+        # Storage first: once the gateway closes, bot.run returns and cancels what's still running
+        await self.shutdown
+        await super().close()
+    
+    async def close_storage(self):
+        self.license.stop()
+        self.watchdog.stop()
+        await metrics.stop()
+        await self.flusher.stop()
+        for db in self.flusher.databases:
+            db.close()
+        try:
+            self.warmup.save_snapshot()
+        except Exception as e:
+            print(f"Error saving invite snapshot: {e}")
+        print(f"✅ Databases flushed: {self.flusher.stats()}")
+    
+    async def setup_hook(self):
+        """Setup hook called when bot starts"""
+        self.watchdog.start()
+        if WATCHDOG_STRICT_MS:
+            # Strict mode: the first blocking call shuts the bot down
+            self.watchdog.task.add_done_callback(lambda task: task.cancelled() or asyncio.ensure_future(self.close()))
         
-        # Check if license file exists (manual verification)
-        license_file = 'license.json'
+        # Read databases and the invite snapshot off the event loop. SQLite
+        # databases only list their keys here; guilds load on first use.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(None, db.open) for db in self.flusher.databases),
+            loop.run_in_executor(None, self.warmup.load_snapshot)
+        )
+        # Scanning giveaways touches every guild, which loads each one in SQLite lazy mode
+        self.giveaway_scheduler.rehydrate(await loop.run_in_executor(None, self.giveaways.load_active))
+        self.startup['databases'] = time.monotonic() - PROCESS_STARTED
         
-        if os.path.exists(license_file):
-            try:
-                with open(license_file, 'r') as f:
-                    license_data = json.load(f)
-                
-                if license_data.get('key') == LICENSE_KEY and license_data.get('status') == 'active':
-                    # Check expiry
-                    if license_data.get('expiry_date'):
-                        expiry = datetime.fromisoformat(license_data['expiry_date'])
-                        if datetime.utcnow() > expiry:
-                            print("❌ LICENSE EXPIRED! Bot shutting down...")
-                            await self.close()
-                            return
-                    
-                    self.license_verified = True
-                    print("✅ License verified successfully!")
-                    print(f"✅ Licensed to: {license_data.get('user', 'Unknown')}")
-                    return
-                elif license_data.get('status') == 'revoked':
-                    print("❌ LICENSE REVOKED! Bot cannot start.")
-                    print(f"❌ Reason: License has been revoked")
-                    await self.close()
-                    return
-            except Exception as e:
-                print(f"❌ Error reading license file: {e}")
+        # Checked in the background so it never holds up readiness
+        self.license.start()
+        self.flusher.start()
+        self.giveaway_scheduler.start()
+        self.giveaway_joins.start()
+        self.auto_roles.start()
+        await metrics.start()
+        # Re-attach buttons on giveaways posted before a restart
+        self.add_view(GiveawayView(self))
+        try:
+            # Make sure buffered writes reach disk on SIGTERM
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(self.close()))
+        except NotImplementedError:
+            pass  # Not supported on Windows
         
-        # If no license file, create one for first-time setup
-        print("⚠️  No license file found. Creating template...")
-        print("⚠️  Please verify your license with the license bot using:")
-        print(f"⚠️  /verify {LICENSE_KEY}")
-        print("⚠️  Then update license.json manually or contact administrator")
+        # Syncing doesn't need to hold up the gateway connection
+        asyncio.create_task(self.sync_commands())
+        self.startup['setup'] = time.monotonic() - PROCESS_STARTED
+    
+    async def sync_commands(self):
+        """Upload slash commands, skipped when they haven't changed since the last sync"""
+        if CLUSTER_ID not in (None, '0'):
+            return  # Global commands are shared, so only the first worker syncs
         
-        # Create template license file
-        template = {
-            "key": LICENSE_KEY,
-            "status": "pending",
-            "user": "Not Verified",
-            "message": "Please verify license with license bot"
-        }
-        with open(license_file, 'w') as f:
-            json.dump(template, f, indent=4)
+        loop = asyncio.get_running_loop()
+        try:
+            fingerprint = command_tree_hash(self.tree, self.application_id)
+            try:
+                synced = await loop.run_in_executor(None, read_json, COMMAND_SYNC_FILE)
+            except (OSError, ValueError):
+                synced = {}
+            if synced.get('hash') == fingerprint and not FORCE_SYNC:
+                print("✅ Commands unchanged, sync skipped")
+                return
+            
+            await self.tree.sync()
+            record = {'hash': fingerprint, 'synced_at': datetime.utcnow().isoformat()}
+            await loop.run_in_executor(None, atomic_write_json, COMMAND_SYNC_FILE, record)
+            print("✅ Commands synced")
+        except Exception as e:
+            print(f"❌ Error syncing commands: {e}")
+    
+    async def on_ready(self):
+        """Called when bot is ready"""
+        print(f'✅ Bot logged in as {self.user}')
+        print(f'✅ Bot ID: {self.user.id}')
+        if 'ready' not in self.startup:
+            self.startup['ready'] = time.monotonic() - PROCESS_STARTED
+            print(
+                f"✅ Ready in {self.startup['ready']:.1f}s "
+                f"(databases {self.startup.get('databases', 0):.1f}s, setup {self.startup.get('setup', 0):.1f}s)"
+            )
         
-        print("⚠️  Bot will continue running but some features may be limited")
-        self.license_verified = True  # Allow bot to run for initial setup
+        # Cache invites for all guilds (once per process, not on every reconnect)
+        self.warmup.start()
     
     async def on_member_join(self, member: discord.Member):
         """Handle new member joins - track invites and assign auto-role"""
-        guild = member.guild
-        
-        # Track invites
-        try:
-            invites_before = self.invite_cache.get(guild.id, {})
-            invites_after = await guild.invites()
+        with metrics.timer('event_seconds', event='on_member_join'):
+            guild = member.guild
             
-            for invite in invites_after:
-                if invite.code in invites_before:
-                    if invite.uses > invites_before[invite.code]:
-                        # Found the invite used
-                        inviter_id = str(invite.inviter.id)
-                        guild_id = str(guild.id)
-                        
-                        if guild_id not in self.invites_db:
-                            self.invites_db[guild_id] = {}
-                        
-                        if inviter_id not in self.invites_db[guild_id]:
-                            self.invites_db[guild_id][inviter_id] = 0
-                        
-                        self.invites_db[guild_id][inviter_id] += 1
-                        Database.save(INVITES_DB, self.invites_db)
-                        break
+            # Index join time for raid selectors
+            self.join_index.add(member)
             
-            # Update cache
-            self.invite_cache[guild.id] = {invite.code: invite.uses for invite in invites_after}
-        except Exception as e:
-            print(f"Error tracking invite: {e}")
-        
-        # Auto-role assignment
-        if AUTO_ROLE_ID:
-            try:
-                role = guild.get_role(int(AUTO_ROLE_ID))
-                if role:
-                    await member.add_roles(role)
-                    print(f"✅ Auto-role assigned to {member.name}")
-            except Exception as e:
-                print(f"Error assigning auto-role: {e}")
+            # Track invites (attributed in batches)
+            self.warmup.touch(guild.id)
+            self.invite_tracker.member_joined(member)
+            
+            # Auto-role assignment (queued)
+            auto_role_id = self.guild_config.get(guild.id)['auto_role_id']
+            if auto_role_id:
+                self.auto_roles.submit(member, auto_role_id)
+    
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        observe_command(interaction, 'ok')
+    
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        """Skip queued work for members who already left and count the leave against their inviter"""
+        self.auto_roles.member_left(payload.guild_id, payload.user.id)
+        self.join_index.remove(payload.guild_id, payload.user.id)
+        self.invite_history.record_leave(str(payload.guild_id), str(payload.user.id))
+    
+    async def on_interaction(self, interaction: discord.Interaction):
+        """Prioritize active guilds during invite warmup"""
+        if interaction.guild_id:
+            self.warmup.touch(interaction.guild_id)
+    
+    async def on_invite_create(self, invite: discord.Invite):
+        """Keep the invite cache current"""
+        self.invite_tracker.invite_created(invite)
+    
+    async def on_invite_delete(self, invite: discord.Invite):
+        """Keep the invite cache current"""
+        self.invite_tracker.invite_deleted(invite)
 
 # Initialize bot
 bot = DiscordBot()
@@ -204,18 +2556,94 @@ bot = DiscordBot()
 # MODERATION COMMANDS
 # ========================================
 
+async def mod_log(guild: discord.Guild, text: str):
+    """Record a moderation action in the guild's log channel, if one is set"""
+    channel = guild.get_channel(bot.guild_config.get(guild.id)['log_channel_id'] or 0)
+    if channel is None:
+        return
+    try:
+        await channel.send(text, allowed_mentions=discord.AllowedMentions.none())
+    except Exception as e:
+        print(f"Error writing to the log channel: {e}")
+
 @bot.tree.command(name="purge", description="Delete a specified number of messages")
-@app_commands.describe(amount="Number of messages to delete")
+@app_commands.describe(
+    amount=f"Number of messages to delete (up to {PURGE_MAX})",
+    user="Only delete messages from this user",
+    contains="Only delete messages containing this text",
+    bots_only="Only delete messages from bots",
+    before="Only delete messages before this message ID",
+    after="Only delete messages after this message ID"
+)
 @app_commands.checks.has_permissions(manage_messages=True)
-async def purge(interaction: discord.Interaction, amount: int):
+async def purge(
+    interaction: discord.Interaction,
+    amount: int,
+    user: discord.User = None,
+    contains: str = None,
+    bots_only: bool = False,
+    before: str = None,
+    after: str = None
+):
     """Delete messages in bulk"""
-    if amount < 1 or amount > 100:
-        await interaction.response.send_message("❌ Please specify a number between 1 and 100", ephemeral=True)
+    if amount < 1 or amount > PURGE_MAX:
+        await interaction.response.send_message(f"❌ Please specify a number between 1 and {PURGE_MAX}", ephemeral=True)
+        return
+    
+    try:
+        before = discord.Object(id=int(before)) if before else None
+        after = discord.Object(id=int(after)) if after else None
+    except ValueError:
+        await interaction.response.send_message("❌ `before` and `after` must be message IDs", ephemeral=True)
+        return
+    
+    if contains and not bot.intents.message_content:
+        # Without the intent Discord sends messages with empty content, so nothing would match
+        await interaction.response.send_message(
+            "❌ `contains` needs the Message Content intent, which lean mode turns off", ephemeral=True
+        )
         return
+    contains = contains.lower() if contains else None
+    
+    def check(message):
+        if user and message.author.id != user.id:
+            return False
+        if bots_only and not message.author.bot:
+            return False
+        if contains and contains not in message.content.lower():
+            return False
+        return True
     
     await interaction.response.defer(ephemeral=True)
-    deleted = await interaction.channel.purge(limit=amount)
-    await interaction.followup.send(f"✅ Deleted {len(deleted)} messages", ephemeral=True)
+    status = await interaction.followup.send(f"🧹 Purging up to {amount} messages...", ephemeral=True, wait=True)
+    
+    async def report(job):
+        await status.edit(content=f"🧹 Purging... {job.deleted}/{amount} deleted ({job.scanned} scanned)")
+    
+    async def finish(content):
+        # The followup token expires after 15 minutes, which a long one-by-one purge can outlast
+        try:
+            await status.edit(content=content)
+        except discord.HTTPException:
+            try:
+                await interaction.channel.send(f"{interaction.user.mention} {content}", delete_after=60)
+            except discord.HTTPException as e:
+                print(f"Error reporting purge result: {e}")
+    
+    job = PurgeJob(interaction.channel, amount, check, before=before, after=after, progress=report)
+    try:
+        await job.run()
+    except discord.Forbidden:
+        await finish("❌ I need the Read Message History and Manage Messages permissions here")
+        return
+    
+    summary = f"✅ Deleted {job.deleted} messages"
+    if job.single_deleted:
+        summary += f" ({job.single_deleted} older than 14 days, deleted one by one)"
+    if job.failed:
+        summary += f"\n⚠️ {job.failed} messages could not be deleted"
+    await mod_log(interaction.guild, f"🧹 {interaction.user.mention} purged {job.deleted} messages in {interaction.channel.mention}")
+    await finish(summary)
 
 @bot.tree.command(name="kick", description="Kick a user from the server")
 @app_commands.describe(user="User to kick", reason="Reason for kick")
@@ -231,6 +2659,8 @@ async def kick(interaction: discord.Interaction, user: discord.Member, reason: s
         await interaction.response.send_message(f"✅ Kicked {user.mention} | Reason: {reason}")
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to kick user: {e}", ephemeral=True)
+        return
+    await mod_log(interaction.guild, f"👢 {interaction.user.mention} kicked {user.mention} | Reason: {reason}")
 
 @bot.tree.command(name="ban", description="Ban a user from the server")
 @app_commands.describe(user="User to ban", reason="Reason for ban")
@@ -246,6 +2676,13 @@ async def ban(interaction: discord.Interaction, user: discord.Member, reason: st
         await interaction.response.send_message(f"✅ Banned {user.mention} | Reason: {reason}")
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to ban user: {e}", ephemeral=True)
+        return
+    await mod_log(interaction.guild, f"🔨 {interaction.user.mention} banned {user.mention} | Reason: {reason}")
+
+async def timeout_member(user: discord.Member, seconds: int, reason: str):
+    """Timeout a member; shared by /mute and warning escalation"""
+    until = discord.utils.utcnow() + timedelta(seconds=seconds)
+    await user.timeout(until, reason=reason)
 
 @bot.tree.command(name="mute", description="Timeout a user for a specified duration")
 @app_commands.describe(user="User to mute", duration="Duration (e.g., 10m, 1h, 2d)")
@@ -257,105 +2694,283 @@ async def mute(interaction: discord.Interaction, user: discord.Member, duration:
         return
     
     # Parse duration
-    time_units = {'m': 60, 'h': 3600, 'd': 86400}
     try:
-        unit = duration[-1]
-        amount = int(duration[:-1])
-        seconds = amount * time_units.get(unit, 60)
+        seconds = parse_duration(duration)
         
         if seconds < 60 or seconds > 2419200:  # Max 28 days
             await interaction.response.send_message("❌ Duration must be between 1 minute and 28 days", ephemeral=True)
             return
         
-        until = discord.utils.utcnow() + timedelta(seconds=seconds)
-        await user.timeout(until, reason=f"Muted by {interaction.user}")
+        await timeout_member(user, seconds, reason=f"Muted by {interaction.user}")
         await interaction.response.send_message(f"✅ Muted {user.mention} for {duration}")
     except Exception as e:
         await interaction.response.send_message(f"❌ Invalid duration format or error: {e}", ephemeral=True)
+        return
+    await mod_log(interaction.guild, f"🔇 {interaction.user.mention} muted {user.mention} for {duration}")
+
+def select_targets(interaction: discord.Interaction, user_ids: str, joined_within: str):
+    """User IDs picked by a mass command: listed IDs/mentions plus recent joins"""
+    selected = [int(user_id) for user_id in re.findall(r'\d{15,20}', user_ids or '')]
+    if joined_within:
+        seconds = parse_duration(joined_within)
+        selected += bot.join_index.joined_since(interaction.guild, seconds)
+    return list(dict.fromkeys(selected))  # Drop duplicates, keep order
+
+async def mass_action(interaction, verb, user_ids, joined_within, dry_run, act, allow_absent=False):
+    """Shared flow of the mass commands: select, check, act, then one summary"""
+    try:
+        selected = select_targets(interaction, user_ids, joined_within)
+    except ValueError:
+        await interaction.response.send_message("❌ Invalid `joined_within` format (e.g., 10m, 1h)", ephemeral=True)
+        return
+    if not selected:
+        await interaction.response.send_message("❌ No users matched. Give user IDs or `joined_within`", ephemeral=True)
+        return
+    if len(selected) > MASS_ACTION_MAX:
+        await interaction.response.send_message(f"❌ {len(selected)} users matched, the limit is {MASS_ACTION_MAX}", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=dry_run)
+    guild = interaction.guild
+    targets, results = await bot.mass_moderation.resolve(guild, interaction.user, selected, allow_absent=allow_absent)
+    if dry_run:
+        results.update((target.id, (True, "would be affected")) for target in targets)
+    else:
+        results.update(await act(guild, targets))
+    
+    done = [user_id for user_id in selected if results[user_id][0]]
+    lines = [f"<@{user_id}> - {results[user_id][1]}" for user_id in selected]
+    title = f"{'🔍 Dry run: ' if dry_run else ''}{verb} {len(done)}/{len(selected)} users"
+    
+    embed = discord.Embed(title=title, color=discord.Color.orange())
+    text = "\n".join(lines)
+    kwargs = {}
+    if len(text) > 4000:
+        # Too long for an embed: show the start and attach everything
+        text = text[:3900].rsplit("\n", 1)[0] + "\n..."
+        kwargs['file'] = discord.File(io.BytesIO("\n".join(lines).encode()), filename="results.txt")
+    embed.description = text
+    embed.set_footer(text=f"By {interaction.user}")
+    await interaction.followup.send(embed=embed, **kwargs)
+    if not dry_run:
+        await mod_log(guild, f"🚨 {interaction.user.mention}: {title}")
+
+MASS_DESCRIBE = dict(
+    user_ids="User IDs or mentions, separated by spaces or commas",
+    joined_within="Also target everyone who joined within this time (e.g., 10m, 1h)",
+    dry_run="Only list who would be affected"
+)
+
+@bot.tree.command(name="massban", description="Ban many users at once")
+@app_commands.describe(reason="Reason for ban", **MASS_DESCRIBE)
+@app_commands.checks.has_permissions(ban_members=True)
+async def massban(interaction: discord.Interaction, user_ids: str = None, joined_within: str = None, reason: str = "No reason provided", dry_run: bool = False):
+    """Ban a list of users or a wave of recent joins"""
+    async def act(guild, targets):
+        return await bot.mass_moderation.ban(guild, targets, reason=reason)
+    await mass_action(interaction, "Banned", user_ids, joined_within, dry_run, act, allow_absent=True)
+
+@bot.tree.command(name="masskick", description="Kick many users at once")
+@app_commands.describe(reason="Reason for kick", **MASS_DESCRIBE)
+@app_commands.checks.has_permissions(kick_members=True)
+async def masskick(interaction: discord.Interaction, user_ids: str = None, joined_within: str = None, reason: str = "No reason provided", dry_run: bool = False):
+    """Kick a list of users or a wave of recent joins"""
+    async def act(guild, targets):
+        return await bot.mass_moderation.run(guild, targets, lambda member: member.kick(reason=reason))
+    await mass_action(interaction, "Kicked", user_ids, joined_within, dry_run, act)
+
+@bot.tree.command(name="masstimeout", description="Timeout many users at once")
+@app_commands.describe(duration="Duration (e.g., 10m, 1h, 2d)", **MASS_DESCRIBE)
+@app_commands.checks.has_permissions(moderate_members=True)
+async def masstimeout(interaction: discord.Interaction, duration: str, user_ids: str = None, joined_within: str = None, dry_run: bool = False):
+    """Timeout a list of users or a wave of recent joins"""
+    try:
+        seconds = parse_duration(duration)
+    except ValueError:
+        seconds = 0
+    if seconds < 60 or seconds > 2419200:  # Max 28 days
+        await interaction.response.send_message("❌ Duration must be between 1 minute and 28 days", ephemeral=True)
+        return
+    
+    reason = f"Muted by {interaction.user}"
+    async def act(guild, targets):
+        return await bot.mass_moderation.run(guild, targets, lambda member: timeout_member(member, seconds, reason))
+    await mass_action(interaction, "Timed out", user_ids, joined_within, dry_run, act)
 
 @bot.tree.command(name="warn", description="Warn a user")
 @app_commands.describe(user="User to warn", reason="Reason for warning")
 @app_commands.checks.has_permissions(moderate_members=True)
 async def warn(interaction: discord.Interaction, user: discord.Member, reason: str = "No reason provided"):
     """Warn a user"""
+    # Warnings can escalate to a timeout, so the same hierarchy rule as /mute applies
+    if user.top_role >= interaction.user.top_role:
+        await interaction.response.send_message("❌ You cannot warn this user (role hierarchy)", ephemeral=True)
+        return
+    
     guild_id = str(interaction.guild_id)
     user_id = str(user.id)
     
-    if guild_id not in bot.warnings_db:
-        bot.warnings_db[guild_id] = {}
+    bot.warnings.add(guild_id, user_id, reason, str(interaction.user.id))
     
-    if user_id not in bot.warnings_db[guild_id]:
-        bot.warnings_db[guild_id][user_id] = []
+    total_warnings = bot.warnings.count(guild_id, user_id)
+    message = (
+        f"⚠️ Warned {user.mention} | Reason: {reason}\n"
+        f"Total warnings: {total_warnings}"
+    )
     
-    warning = {
-        "reason": reason,
-        "moderator": str(interaction.user.id),
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    # Auto-escalation through the same timeout path as /mute
+    rule = bot.warnings.escalation_for(guild_id, user_id, bot.guild_config.get(guild_id)['escalation_rules'])
+    if rule:
+        count, window, seconds = rule
+        try:
+            await timeout_member(user, seconds, reason=f"{count} warnings in {format_seconds(window)}")
+            message += f"\n🔇 Auto-muted for {format_seconds(seconds)} ({count} warnings in {format_seconds(window)})"
+        except Exception as e:
+            message += f"\n❌ Auto-mute failed: {e}"
     
-    bot.warnings_db[guild_id][user_id].append(warning)
-    Database.save(WARNINGS_DB, bot.warnings_db)
+    await interaction.response.send_message(message)
+    await mod_log(interaction.guild, f"{interaction.user.mention}: {message}")
+
+@bot.tree.command(name="warnings", description="List a user's active warnings")
+@app_commands.describe(user="User to check")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def warnings_command(interaction: discord.Interaction, user: discord.Member):
+    """List active warnings, newest first"""
+    warnings = bot.warnings.active(str(interaction.guild_id), str(user.id))
+    if not warnings:
+        await interaction.response.send_message(f"✅ {user.mention} has no active warnings", ephemeral=True)
+        return
     
-    total_warnings = len(bot.warnings_db[guild_id][user_id])
-    await interaction.response.send_message(
-        f"⚠️ Warned {user.mention} | Reason: {reason}\n"
-        f"Total warnings: {total_warnings}"
+    embed = discord.Embed(
+        title=f"⚠️ Warnings for {user}",
+        description=f"{len(warnings)} active warning(s)",
+        color=discord.Color.orange()
     )
+    for number in range(len(warnings), max(len(warnings) - 10, 0), -1):
+        warning = warnings[number - 1]
+        embed.add_field(
+            name=f"#{number}: {warning['reason']}",
+            value=f"By <@{warning['moderator']}> <t:{int(utc_timestamp(warning['timestamp']))}:R>",
+            inline=False
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="clearwarn", description="Remove one or all of a user's warnings")
+@app_commands.describe(user="User to clear", number="Warning number from /warnings (default: all)")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def clearwarn(interaction: discord.Interaction, user: discord.Member, number: int = None):
+    """Clear warnings"""
+    removed = bot.warnings.clear(str(interaction.guild_id), str(user.id), number)
+    if not removed:
+        await interaction.response.send_message("❌ No matching warnings found", ephemeral=True)
+        return
+    await interaction.response.send_message(f"✅ Removed {removed} warning(s) from {user.mention}")
+    await mod_log(interaction.guild, f"🧽 {interaction.user.mention} removed {removed} warning(s) from {user.mention}")
+
+@bot.tree.command(name="warnstats", description="Show warning statistics for this server")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def warnstats(interaction: discord.Interaction):
+    """Warning counts over time"""
+    guild_id = str(interaction.guild_id)
+    embed = discord.Embed(title="📈 Warning Statistics", color=discord.Color.orange())
+    embed.add_field(name="Last 24h", value=str(bot.warnings.guild_count(guild_id, 86400)), inline=True)
+    embed.add_field(name="Last 7d", value=str(bot.warnings.guild_count(guild_id, 7 * 86400)), inline=True)
+    embed.add_field(name="Last 30d", value=str(bot.warnings.guild_count(guild_id, 30 * 86400)), inline=True)
+    embed.add_field(name="Active Warnings", value=str(bot.warnings.guild_count(guild_id)), inline=True)
+    embed.add_field(name="Warned Users", value=str(bot.warnings.warned_users(guild_id)), inline=True)
+    await interaction.response.send_message(embed=embed)
 
 # ========================================
 # INVITE TRACKING COMMANDS
 # ========================================
 
+# Windows offered by /invites and giveaways, in days (None = all time)
+INVITE_WINDOWS = [
+    app_commands.Choice(name="Last 7 days", value=7),
+    app_commands.Choice(name="Last 30 days", value=INVITE_HISTORY_DAYS),
+    app_commands.Choice(name="All time", value=0)
+]
+
 @bot.tree.command(name="invites", description="Check invite count for a user")
-@app_commands.describe(user="User to check invites for")
-async def invites(interaction: discord.Interaction, user: discord.Member = None):
-    """Check invite count"""
+@app_commands.describe(user="User to check invites for", window="Only count invites from this period (default: all time)")
+@app_commands.choices(window=INVITE_WINDOWS)
+@user_cooldown()
+async def invites(interaction: discord.Interaction, user: discord.Member = None, window: app_commands.Choice[int] = None):
+    """Check invite count, minus invited members who left"""
     user = user or interaction.user
     guild_id = str(interaction.guild_id)
     user_id = str(user.id)
+    days = window.value if window else None
+    
+    # Rebuilt only after this guild's invite data changes (or the day rolls over, for windows)
+    version = (
+        bot.invites_db.versions.get(guild_id, 0), bot.invite_history_db.versions.get(guild_id, 0),
+        InviteHistory.today() if days else None, user.display_avatar.key
+    )
+    embed = bot.embeds.get(guild_id, ('invites', user_id, days), version)
+    if embed is not None:
+        await interaction.response.send_message(embed=embed)
+        return
     
-    invite_count = bot.invites_db.get(guild_id, {}).get(user_id, 0)
+    joins, leaves = bot.invite_history.counts(guild_id, user_id, days or None)
+    real = max(joins - leaves, 0)
     
     embed = discord.Embed(
-        title="📊 Invite Statistics",
-        description=f"{user.mention} has **{invite_count}** invites",
+        title="📊 Invite Statistics" + (f" ({window.name})" if days else ""),
+        description=f"{user.mention} has **{real}** invites",
         color=discord.Color.blue()
     )
+    embed.add_field(name="Joined", value=str(joins), inline=True)
+    embed.add_field(name="Left", value=str(leaves), inline=True)
+    embed.add_field(name="Real", value=str(real), inline=True)
+    if joins >= 5 and leaves * 2 >= joins:
+        embed.set_footer(text="⚠️ Half or more of these members left again")
     embed.set_thumbnail(url=user.display_avatar.url)
+    bot.embeds.put(guild_id, ('invites', user_id, days), version, embed)
     
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="topinvites", description="Show top 10 inviters")
-async def topinvites(interaction: discord.Interaction):
+@app_commands.describe(page="Leaderboard page (10 inviters per page)")
+@user_cooldown()
+async def topinvites(interaction: discord.Interaction, page: app_commands.Range[int, 1, 1000] = 1):
     """Show leaderboard of top inviters"""
     guild_id = str(interaction.guild_id)
+    board = bot.leaderboards.get(guild_id)
     
-    if guild_id not in bot.invites_db or not bot.invites_db[guild_id]:
+    if not board:
         await interaction.response.send_message("❌ No invite data available", ephemeral=True)
         return
     
-    # Sort by invite count
-    sorted_invites = sorted(
-        bot.invites_db[guild_id].items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:10]
+    embed = bot.leaderboards.cached_embed(guild_id, page)
+    if embed is not None:
+        await interaction.response.send_message(embed=embed)
+        return
+    
+    offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+    entries = board.top(LEADERBOARD_PAGE_SIZE, offset)
+    if not entries:
+        await interaction.response.send_message("❌ No inviters on this page", ephemeral=True)
+        return
+    
+    # Usernames may need fetching when the member cache is trimmed
+    await interaction.response.defer()
+    usernames = await asyncio.gather(*(get_user_name(bot, int(user_id)) for user_id, _ in entries))
     
     embed = discord.Embed(
-        title="🏆 Top 10 Inviters",
+        title="🏆 Top 10 Inviters" if page == 1 else f"🏆 Top Inviters (Page {page})",
         color=discord.Color.gold()
     )
     
-    for i, (user_id, count) in enumerate(sorted_invites, 1):
-        user = bot.get_user(int(user_id))
-        username = user.name if user else f"User {user_id}"
+    for i, ((user_id, count), username) in enumerate(zip(entries, usernames), offset + 1):
         embed.add_field(
             name=f"{i}. {username}",
             value=f"**{count}** invites",
             inline=False
         )
+    bot.leaderboards.cache_embed(guild_id, page, embed)
     
-    await interaction.response.send_message(embed=embed)
+    await interaction.followup.send(embed=embed)
 
 # ========================================
 # GIVEAWAY SYSTEM
@@ -364,152 +2979,399 @@ async def topinvites(interaction: discord.Interaction):
 @bot.tree.command(name="giveaway_start", description="Start a giveaway")
 @app_commands.describe(
     duration="Duration in seconds",
-    min_invites="Minimum invites required to participate",
-    required_role="Optional: Required role to participate"
+    min_invites="Minimum invites required to participate (default: /config giveaway)",
+    required_role="Optional: Required role to participate (default: /config giveaway)",
+    winners="Number of winners to draw (default: /config giveaway)",
+    invite_window="Only count invites from this period, minus members who left (default: all time)"
 )
+@app_commands.choices(invite_window=INVITE_WINDOWS)
 @app_commands.checks.has_permissions(manage_guild=True)
 async def giveaway_start(
     interaction: discord.Interaction,
     duration: int,
-    min_invites: int = 0,
-    required_role: discord.Role = None
+    min_invites: app_commands.Range[int, 0] = None,
+    required_role: discord.Role = None,
+    winners: app_commands.Range[int, 1, 50] = None,
+    invite_window: app_commands.Choice[int] = None
 ):
     """Start a giveaway"""
     guild_id = str(interaction.guild_id)
-    
-    if guild_id in bot.giveaway_db and bot.giveaway_db[guild_id].get('active'):
-        await interaction.response.send_message("❌ A giveaway is already active!", ephemeral=True)
-        return
-    
+    settings = bot.guild_config.get(guild_id)
+    min_invites = settings['giveaway_min_invites'] if min_invites is None else min_invites
+    winners = winners or settings['giveaway_winners']
+    required_role = required_role or interaction.guild.get_role(settings['giveaway_role_id'] or 0)
     end_time = datetime.utcnow() + timedelta(seconds=duration)
     
-    bot.giveaway_db[guild_id] = {
-        'active': True,
-        'channel_id': interaction.channel_id,
-        'message_id': None,
-        'end_time': end_time.isoformat(),
-        'min_invites': min_invites,
-        'required_role_id': required_role.id if required_role else None,
-        'participants': []
-    }
-    
     embed = discord.Embed(
         title="🎉 GIVEAWAY STARTED!",
         description="Click the button below to participate!",
         color=discord.Color.green()
     )
     embed.add_field(name="Duration", value=f"{duration} seconds", inline=True)
-    embed.add_field(name="Min. Invites", value=str(min_invites), inline=True)
+    invite_days = invite_window.value if invite_window else 0
+    embed.add_field(
+        name="Min. Invites",
+        value=f"{min_invites} ({invite_window.name.lower()})" if invite_days else str(min_invites),
+        inline=True
+    )
+    embed.add_field(name="Winners", value=str(winners), inline=True)
     if required_role:
         embed.add_field(name="Required Role", value=required_role.mention, inline=True)
     embed.set_footer(text=f"Ends at {end_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     
-    await interaction.response.send_message(embed=embed, view=GiveawayView(bot))
-    
-    message = await interaction.original_response()
-    bot.giveaway_db[guild_id]['message_id'] = message.id
-    Database.save(GIVEAWAY_DB, bot.giveaway_db)
+    # Clicks can arrive before the message ID is known; they're asked to retry
+    with bot.giveaways.start(guild_id):
+        await interaction.response.send_message(embed=embed, view=GiveawayView(bot))
+        message = await interaction.original_response()
+    message_id = str(message.id)
+    bot.giveaways.create(guild_id, message_id, {
+        'active': True,
+        'channel_id': interaction.channel_id,
+        'end_time': end_time.isoformat(),
+        'min_invites': min_invites,
+        'invite_window': invite_days or None,
+        'required_role_id': required_role.id if required_role else None,
+        'winners': winners,
+        'winner_ids': [],
+        'participants': []
+    })
     
     # Schedule giveaway end
-    await asyncio.sleep(duration)
-    await end_giveaway(interaction.guild, interaction.channel)
+    bot.giveaway_scheduler.schedule((guild_id, message_id), utc_timestamp(end_time.isoformat()))
 
-@bot.tree.command(name="giveaway_end", description="End the active giveaway")
+@bot.tree.command(name="giveaway_end", description="End a giveaway now")
+@app_commands.describe(message_id="Giveaway message ID (default: the latest active giveaway)")
 @app_commands.checks.has_permissions(manage_guild=True)
-async def giveaway_end_command(interaction: discord.Interaction):
+async def giveaway_end_command(interaction: discord.Interaction, message_id: str = None):
     """Manually end a giveaway"""
+    message_id = message_id or bot.giveaways.latest_active(str(interaction.guild_id))
+    giveaway = bot.giveaways.get(str(interaction.guild_id), message_id) if message_id else None
+    if not giveaway or not giveaway.get('active'):
+        await interaction.response.send_message("❌ No active giveaway found!", ephemeral=True)
+        return
+    
     await interaction.response.defer()
-    await end_giveaway(interaction.guild, interaction.channel)
+    await end_giveaway(interaction.guild, message_id)
     await interaction.followup.send("✅ Giveaway ended!")
 
-async def end_giveaway(guild: discord.Guild, channel: discord.TextChannel):
-    """End giveaway and select winner"""
+@bot.tree.command(name="giveaway_reroll", description="Draw new winners for an ended giveaway")
+@app_commands.describe(message_id="Giveaway message ID", winners="Number of new winners to draw")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def giveaway_reroll(interaction: discord.Interaction, message_id: str, winners: app_commands.Range[int, 1, 50] = 1):
+    """Draw replacement winners, skipping everyone who already won"""
+    guild_id = str(interaction.guild_id)
+    giveaway = bot.giveaways.get(guild_id, message_id)
+    if not giveaway:
+        await interaction.response.send_message("❌ Giveaway not found!", ephemeral=True)
+        return
+    if giveaway.get('active'):
+        await interaction.response.send_message("❌ This giveaway is still running!", ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    winner_ids = await draw_winners(interaction.guild, message_id, winners, exclude=giveaway.get('winner_ids', []))
+    if not winner_ids:
+        await interaction.followup.send("❌ No eligible participants left to draw!", ephemeral=True)
+        return
+    
+    bot.giveaways.add_winners(guild_id, message_id, winner_ids)
+    mentions = ", ".join(f"<@{winner_id}>" for winner_id in winner_ids)
+    embed = discord.Embed(
+        title="🔁 GIVEAWAY REROLLED!",
+        description=f"Congratulations {mentions}!",
+        color=discord.Color.gold()
+    )
+    await interaction.followup.send(embed=embed)
+
+async def draw_winners(guild: discord.Guild, message_id: str, count: int, exclude=()) -> list:
+    """Draw winners who are still in the server, redrawing for any who left"""
+    guild_id = str(guild.id)
+    excluded = list(exclude)
+    winners = []
+    while len(winners) < count:
+        drawn = bot.giveaways.draw(guild_id, message_id, count - len(winners), exclude=excluded)
+        if not drawn:
+            break
+        for user_id in drawn:
+            excluded.append(user_id)
+            if await get_or_fetch_member(guild, int(user_id)):
+                winners.append(user_id)
+    return winners
+
+async def end_giveaway(guild: discord.Guild, message_id: str):
+    """End giveaway and select winners"""
     guild_id = str(guild.id)
+    giveaway = bot.giveaways.get(guild_id, message_id)
     
-    if guild_id not in bot.giveaway_db or not bot.giveaway_db[guild_id].get('active'):
+    if not giveaway or not giveaway.get('active'):
         return
     
-    giveaway = bot.giveaway_db[guild_id]
-    participants = giveaway['participants']
+    bot.giveaway_scheduler.cancel((guild_id, message_id))
+    # Mark it ended before any awaits so it can't be ended twice
+    bot.giveaways.finish(guild_id, message_id, [])
+    winner_ids = await draw_winners(guild, message_id, giveaway.get('winners', 1))
+    bot.giveaways.add_winners(guild_id, message_id, winner_ids)
     
-    if not participants:
+    channel = guild.get_channel(giveaway['channel_id']) or await guild.fetch_channel(giveaway['channel_id'])
+    if not winner_ids:
         await channel.send("❌ No participants in the giveaway!")
     else:
-        winner_id = random.choice(participants)
-        winner = guild.get_member(int(winner_id))
-        
+        mentions = ", ".join(f"<@{winner_id}>" for winner_id in winner_ids)
         embed = discord.Embed(
             title="🎊 GIVEAWAY ENDED!",
-            description=f"Congratulations {winner.mention}!",
+            description=f"Congratulations {mentions}!",
             color=discord.Color.gold()
         )
         await channel.send(embed=embed)
-    
-    bot.giveaway_db[guild_id]['active'] = False
-    Database.save(GIVEAWAY_DB, bot.giveaway_db)
 
 class GiveawayView(discord.ui.View):
     def __init__(self, bot):
         super().__init__(timeout=None)
         self.bot = bot
     
-    @discord.ui.button(label="Join Giveaway", style=discord.ButtonStyle.green, emoji="🎉")
+    @discord.ui.button(label="Join Giveaway", style=discord.ButtonStyle.green, emoji="🎉", custom_id="giveaway:join")
     async def join_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        with metrics.timer('event_seconds', event='join_button'):
+            await self._join(interaction)
+    
+    async def _join(self, interaction: discord.Interaction):
         guild_id = str(interaction.guild_id)
+        message_id = str(interaction.message.id)
         user_id = str(interaction.user.id)
         
-        giveaway = self.bot.giveaway_db.get(guild_id, {})
+        giveaway = self.bot.giveaways.get(guild_id, message_id)
         
-        if not giveaway.get('active'):
+        if not giveaway and guild_id in self.bot.giveaways.starting:
+            # Clicked before giveaway_start stored it
+            await interaction.response.send_message("⏳ This giveaway is still starting, try again in a moment!", ephemeral=True)
+            return
+        if not giveaway or not giveaway.get('active'):
             await interaction.response.send_message("❌ This giveaway is no longer active!", ephemeral=True)
             return
         
         # Check if already participating
-        if user_id in giveaway['participants']:
+        if self.bot.giveaways.has_entered(guild_id, message_id, user_id):
             await interaction.response.send_message("❌ You're already participating!", ephemeral=True)
             return
         
-        # Check minimum invites
-        min_invites = giveaway.get('min_invites', 0)
-        user_invites = self.bot.invites_db.get(guild_id, {}).get(user_id, 0)
-        
-        if user_invites < min_invites:
-            await interaction.response.send_message(
-                f"❌ You need at least {min_invites} invites to participate! (You have {user_invites})",
-                ephemeral=True
-            )
-            return
-        
-        # Check required role
-        required_role_id = giveaway.get('required_role_id')
-        if required_role_id:
-            role = interaction.guild.get_role(required_role_id)
-            if role and role not in interaction.user.roles:
-                await interaction.response.send_message(
-                    f"❌ You need the {role.mention} role to participate!",
-                    ephemeral=True
-                )
-                return
-        
-        # Add participant
-        giveaway['participants'].append(user_id)
-        Database.save(GIVEAWAY_DB, self.bot.giveaway_db)
-        
-        await interaction.response.send_message("✅ You've joined the giveaway! Good luck!", ephemeral=True)
+        # Eligibility is checked in batches; acknowledge right away
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        self.bot.giveaway_joins.submit(interaction, guild_id, message_id)
+
+# ========================================
+# SERVER SETTINGS COMMANDS
+# ========================================
+
+CONFIG_SETTING_NAMES = {
+    'auto_role_id': "Auto-role",
+    'log_channel_id': "Log channel",
+    'warn_escalation': "Warn escalation",
+    'giveaway_winners': "Giveaway winners",
+    'giveaway_min_invites': "Giveaway min. invites",
+    'giveaway_role_id': "Giveaway required role"
+}
+
+config_group = app_commands.Group(
+    name="config",
+    description="Server settings",
+    guild_only=True,
+    default_permissions=discord.Permissions(manage_guild=True)
+)
+
+def describe_setting(key, settings) -> str:
+    value = settings[key]
+    if key == 'warn_escalation':
+        rules = settings['escalation_rules']
+        return ", ".join(
+            f"{count} in {format_seconds(window)} → {format_seconds(timeout)}" for count, window, timeout in rules
+        ) or "Off"
+    if key in ('auto_role_id', 'giveaway_role_id'):
+        return f"<@&{value}>" if value else "Off"
+    if key == 'log_channel_id':
+        return f"<#{value}>" if value else "Off"
+    return str(value)
+
+@config_group.command(name="show", description="Show this server's settings")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_show(interaction: discord.Interaction):
+    """Show settings, marking the ones still at their default"""
+    settings = bot.guild_config.get(interaction.guild_id)
+    overrides = bot.guild_config.overrides(interaction.guild_id)
+    embed = discord.Embed(title="⚙️ Server Settings", color=discord.Color.blue())
+    for key, name in CONFIG_SETTING_NAMES.items():
+        value = describe_setting(key, settings)
+        embed.add_field(name=name, value=value if key in overrides else f"{value} (default)", inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@config_group.command(name="autorole", description="Set the role given to new members")
+@app_commands.describe(role="Role to give (leave empty to turn auto-role off)")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_autorole(interaction: discord.Interaction, role: discord.Role = None):
+    """Set or turn off the auto-role"""
+    if role and (role.managed or role >= interaction.guild.me.top_role):
+        await interaction.response.send_message("❌ I can't assign that role (managed or above my highest role)", ephemeral=True)
+        return
+    bot.guild_config.set(interaction.guild_id, 'auto_role_id', role.id if role else None)
+    await interaction.response.send_message(f"✅ Auto-role set to {role.mention}" if role else "✅ Auto-role turned off", ephemeral=True)
+
+@config_group.command(name="logchannel", description="Set the channel moderation actions are logged to")
+@app_commands.describe(channel="Log channel (leave empty to turn logging off)")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_logchannel(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    """Set or turn off the moderation log"""
+    bot.guild_config.set(interaction.guild_id, 'log_channel_id', channel.id if channel else None)
+    await interaction.response.send_message(f"✅ Logging to {channel.mention}" if channel else "✅ Logging turned off", ephemeral=True)
+
+@config_group.command(name="escalation", description="Set when warnings auto-mute a user")
+@app_commands.describe(rules="Rules like 3/24h=1h,5/7d=1d (warnings/window=timeout), or 'off'")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_escalation(interaction: discord.Interaction, rules: str):
+    """Set warning escalation rules"""
+    rules = '' if rules.strip().lower() == 'off' else rules.replace(' ', '')
+    try:
+        parsed = parse_escalation(rules)
+    except (ValueError, IndexError):
+        parsed = None
+    if parsed is None or any(count < 1 or not 60 <= timeout <= 2419200 for count, _, timeout in parsed):
+        await interaction.response.send_message(
+            "❌ Use rules like `3/24h=1h,5/7d=1d` with timeouts between 1 minute and 28 days, or `off`", ephemeral=True
+        )
+        return
+    bot.guild_config.set(interaction.guild_id, 'warn_escalation', rules)
+    described = describe_setting('warn_escalation', bot.guild_config.get(interaction.guild_id))
+    await interaction.response.send_message(f"✅ Warn escalation: {described}", ephemeral=True)
+
+@config_group.command(name="giveaway", description="Set defaults for new giveaways")
+@app_commands.describe(
+    winners="Default number of winners",
+    min_invites="Default minimum invites to participate",
+    required_role="Default role required to participate"
+)
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_giveaway(
+    interaction: discord.Interaction,
+    winners: app_commands.Range[int, 1, 50] = None,
+    min_invites: app_commands.Range[int, 0] = None,
+    required_role: discord.Role = None
+):
+    """Set giveaway defaults"""
+    changes = {'giveaway_winners': winners, 'giveaway_min_invites': min_invites}
+    changes = {key: value for key, value in changes.items() if value is not None}
+    if required_role:
+        changes['giveaway_role_id'] = required_role.id
+    if not changes:
+        await interaction.response.send_message("❌ Give at least one setting to change", ephemeral=True)
+        return
+    for key, value in changes.items():
+        bot.guild_config.set(interaction.guild_id, key, value)
+    settings = bot.guild_config.get(interaction.guild_id)
+    summary = ", ".join(f"{CONFIG_SETTING_NAMES[key]}: {describe_setting(key, settings)}" for key in changes)
+    await interaction.response.send_message(f"✅ {summary}", ephemeral=True)
+
+@config_group.command(name="reset", description="Put a setting back to its default")
+@app_commands.describe(setting="Setting to reset")
+@app_commands.choices(setting=[app_commands.Choice(name=name, value=key) for key, name in CONFIG_SETTING_NAMES.items()])
+@app_commands.checks.has_permissions(manage_guild=True)
+async def config_reset(interaction: discord.Interaction, setting: app_commands.Choice[str]):
+    """Reset one setting"""
+    bot.guild_config.reset(interaction.guild_id, setting.value)
+    value = describe_setting(setting.value, bot.guild_config.get(interaction.guild_id))
+    await interaction.response.send_message(f"✅ {setting.name} reset to the default: {value}", ephemeral=True)
+
+bot.tree.add_command(config_group)
 
 # ========================================
 # UTILITY COMMANDS
 # ========================================
 
 @bot.tree.command(name="ping", description="Check if the bot is responsive")
+@user_cooldown()
 async def ping(interaction: discord.Interaction):
     """Check bot latency"""
     latency = round(bot.latency * 1000)
-    await interaction.response.send_message(f"🏓 Pong! Latency: {latency}ms")
+    if not SHARDED:
+        await interaction.response.send_message(f"🏓 Pong! Latency: {latency}ms")
+        return
+    
+    # Per-shard latency and guild counts for this worker
+    guild_counts = {}
+    for guild in bot.guilds:
+        guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+    
+    lines = [f"🏓 Pong! Average latency: {latency}ms (this server: shard {interaction.guild.shard_id if interaction.guild else 0})"]
+    for shard_id, shard_latency in sorted(bot.latencies):
+        lines.append(f"Shard {shard_id}: {shard_latency * 1000:.0f}ms • {guild_counts.get(shard_id, 0)} servers")
+    await interaction.response.send_message("\n".join(lines))
 
-@bot.tree.command(name="help", description="Show all available commands")
-async def help_command(interaction: discord.Interaction):
-    """Show help menu"""
+@bot.tree.command(name="stats", description="Show bot performance metrics (admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def stats(interaction: discord.Interaction):
+    """Summarize hot-path metrics"""
+    def ms(seconds):
+        return f"{seconds * 1000:.1f}ms"
+    
+    def timings(name, describe):
+        rows = sorted(metrics.series(name).items(), key=lambda item: -item[1].count)[:8]
+        lines = [
+            f"{describe(dict(labels))} {hist.count}× • p50 {ms(hist.percentile(50))} • p99 {ms(hist.percentile(99))}"
+            for labels, hist in rows
+        ]
+        return "\n".join(lines) or "No data yet"
+    
+    embed = discord.Embed(title="📈 Bot Metrics", color=discord.Color.blue())
+    embed.add_field(
+        name="⏱️ Commands",
+        value=timings('command_seconds', lambda l: f"`/{l['command']}`" + {'error': " ❌", 'cooldown': " ⏳"}.get(l['status'], "")),
+        inline=False
+    )
+    embed.add_field(name="📨 Events", value=timings('event_seconds', lambda l: f"`{l['event']}`"), inline=False)
+    
+    routes = {}
+    for labels, count in metrics.series('discord_rest_requests_total').items():
+        route = dict(labels)['route']
+        routes[route] = routes.get(route, 0) + count
+    limited = sum(metrics.series('discord_rate_limited_total').values())
+    rest = [f"{sum(routes.values())} requests • {limited} rate limited (429)"]
+    rest += [f"`{route}` {count}" for route, count in sorted(routes.items(), key=lambda item: -item[1])[:5]]
+    embed.add_field(name="🌐 Discord API", value="\n".join(rest), inline=False)
+    
+    written = {dict(labels)['db']: count for labels, count in metrics.series('db_bytes_written_total').items()}
+    storage = [
+        f"`{dict(labels)['db']}` {hist.count} flushes • p99 {ms(hist.percentile(99))} • {written.get(dict(labels)['db'], 0) / 1024:.1f} KiB"
+        for labels, hist in metrics.series('db_flush_seconds').items()
+    ]
+    coalesced = sum(metrics.series('db_writes_coalesced_total').values())
+    storage.append(f"{coalesced} writes merged before reaching disk")
+    lazy_loads = sum(metrics.series('db_lazy_loads_total').values())
+    if lazy_loads:
+        storage.append(f"{lazy_loads} guilds loaded on demand")
+    embed.add_field(name="💾 Storage", value="\n".join(storage), inline=False)
+    
+    queues = []
+    for name, callback in sorted(metrics.gauges.items()):
+        try:
+            queues.append(f"`{name}` {callback():g}")
+        except Exception:
+            continue
+    embed.add_field(name="📥 Gauges", value="\n".join(queues) or "None", inline=False)
+    
+    warmup = bot.warmup.stats()
+    if warmup['total']:
+        progress = f"done in {warmup['elapsed_s']}s" if warmup['elapsed_s'] is not None else "in progress"
+        embed.add_field(
+            name="🔥 Invite Cache Warmup",
+            value=f"{warmup['warmed']}/{warmup['total']} servers • {warmup['failed']} failed • {progress}",
+            inline=False
+        )
+    
+    lag = metrics.series('event_loop_lag_seconds').get(())
+    if lag and lag.recent:
+        embed.add_field(name="🔁 Event Loop Lag", value=f"p50 {ms(lag.percentile(50))} • p99 {ms(lag.percentile(99))} • max {ms(max(lag.recent))} • {bot.watchdog.stalls} stalls", inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def build_help_embed() -> discord.Embed:
+    """The help menu; it never changes, so it's built once at startup"""
     embed = discord.Embed(
         title="📚 Bot Commands",
         description="Here are all available commands:",
@@ -519,11 +3381,15 @@ async def help_command(interaction: discord.Interaction):
     embed.add_field(
         name="🛡️ Moderation",
         value=(
-            "`/purge <amount>` - Delete messages\n"
+            "`/purge <amount> [filters]` - Delete messages\n"
             "`/kick <user> [reason]` - Kick user\n"
             "`/ban <user> [reason]` - Ban user\n"
             "`/mute <user> <duration>` - Timeout user\n"
-            "`/warn <user> [reason]` - Warn user"
+            "`/massban`, `/masskick`, `/masstimeout` - Act on many users or recent joins\n"
+            "`/warn <user> [reason]` - Warn user\n"
+            "`/warnings <user>` - List warnings\n"
+            "`/clearwarn <user> [number]` - Remove warnings\n"
+            "`/warnstats` - Warning statistics"
         ),
         inline=False
     )
@@ -532,7 +3398,7 @@ async def help_command(interaction: discord.Interaction):
         name="📊 Invite Tracking",
         value=(
             "`/invites [user]` - Check invites\n"
-            "`/topinvites` - Top 10 inviters"
+            "`/topinvites [page]` - Top inviters"
         ),
         inline=False
     )
@@ -541,7 +3407,8 @@ async def help_command(interaction: discord.Interaction):
         name="🎉 Giveaways",
         value=(
             "`/giveaway_start` - Start giveaway\n"
-            "`/giveaway_end` - End giveaway"
+            "`/giveaway_end [message_id]` - End giveaway\n"
+            "`/giveaway_reroll <message_id>` - Draw new winners"
         ),
         inline=False
     )
@@ -550,12 +3417,21 @@ async def help_command(interaction: discord.Interaction):
         name="⚙️ Utility",
         value=(
             "`/ping` - Check bot status\n"
+            "`/config show` - Server settings: auto-role, log channel, warn escalation, giveaway defaults\n"
+            "`/stats` - Performance metrics (admin)\n"
             "`/help` - Show this menu"
         ),
         inline=False
     )
-    
-    await interaction.response.send_message(embed=embed)
+    return embed
+
+HELP_EMBED = build_help_embed()
+
+@bot.tree.command(name="help", description="Show all available commands")
+@user_cooldown()
+async def help_command(interaction: discord.Interaction):
+    """Show help menu"""
+    await interaction.response.send_message(embed=HELP_EMBED)
 
 # ========================================
 # BOT START
@@ -569,3 +3445,5 @@ if __name__ == "__main__":
     else:
         print("🚀 Starting Discord Bot...")
         bot.run(TOKEN)
+        if bot.watchdog.violations:
+            sys.exit("❌ Strict mode: the event loop was blocked")
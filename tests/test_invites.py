@@ -0,0 +1,106 @@
+"""Invite credit, windowed invite history and leaderboard ranking."""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+@pytest.fixture
+def clock(monkeypatch):
+    day = [100]
+    monkeypatch.setattr(main.InviteHistory, 'today', staticmethod(lambda: day[0]))
+    return day
+
+@pytest.fixture
+def history(tmp_path, clock):
+    databases = []
+    for name in ('history.json', 'invites.json'):
+        filename = str(tmp_path / name)
+        db = main.Database(filename, storage=main.JSONLogStorage(filename))
+        db.open()
+        databases.append(db)
+    return main.InviteHistory(*databases, days=3)
+
+def test_history_window_rolls_over(history, clock):
+    history.record_join('g', 'm1', 'inv', 'abc')
+    history.record_join('g', 'm2', 'inv', 'abc')
+    clock[0] = 101
+    history.record_join('g', 'm3', 'inv', 'abc')
+
+    assert history.counts('g', 'inv', 1) == (1, 0)
+    assert history.counts('g', 'inv', 7) == (3, 0)  # Capped to the 3-day ring
+
+    clock[0] = 103
+    assert history.counts('g', 'inv', 3) == (1, 0)
+
+    # Day 104 reuses day 101's bucket, which has to start from zero
+    clock[0] = 104
+    history.record_join('g', 'm4', 'inv', 'abc')
+    assert history.counts('g', 'inv', 3) == (1, 0)
+
+    clock[0] = 110
+    assert history.counts('g', 'inv', 3) == (0, 0)
+
+def test_history_leave_counts_against_join_day(history, clock):
+    history.totals.increment(['g', 'inv'])
+    history.record_join('g', 'm1', 'inv', 'abc')
+    clock[0] = 101
+    history.record_leave('g', 'm1')
+    history.record_leave('g', 'm1')  # Duplicate events count once
+
+    assert history.counts('g', 'inv', 1) == (0, 0)
+    assert history.counts('g', 'inv', 2) == (1, 1)
+    assert history.real('g', 'inv', 2) == 0
+    assert history.counts('g', 'inv') == (1, 1)
+
+def test_history_leave_after_window_only_counts_lifetime(history, clock):
+    history.record_join('g', 'm1', 'inv', 'abc')
+    clock[0] = 105
+    history.record_leave('g', 'm1')
+
+    assert history.counts('g', 'inv', 3) == (0, 0)
+    assert history.counts('g', 'inv')[1] == 1
+
+def invite(inviter_id, uses, max_uses=0):
+    return {'inviter_id': inviter_id, 'uses': uses, 'max_uses': max_uses}
+
+def test_diff_credits_used_invites():
+    before = {'a': invite('1', 3), 'b': invite('2', 0)}
+    after = {'a': invite('1', 5), 'b': invite('2', 0), 'new': invite('3', 1)}
+    assert sorted(main.InviteTracker._diff(before, after, {})) == [('a', '1'), ('a', '1'), ('new', '3')]
+
+def test_diff_credits_one_use_invite_that_vanished():
+    before = {'once': invite('1', 0, max_uses=1), 'revoked': invite('2', 0, max_uses=5)}
+    assert main.InviteTracker._diff(before, {}, {}) == [('once', '1')]
+
+def test_diff_credits_recently_deleted_one_use_invite():
+    now = time.monotonic()
+    deleted = {
+        'recent': (invite('1', 0, max_uses=1), now),
+        'stale': (invite('2', 0, max_uses=1), now - main.DELETED_INVITE_TTL - 1),
+    }
+    assert main.InviteTracker._diff({}, {}, deleted) == [('recent', '1')]
+
+def test_leaderboard_top_with_offset():
+    board = main.Leaderboard({'a': 5, 'b': 3, 'c': 3, 'd': 1, 'e': 7})
+
+    assert board.top(2) == [('e', 7), ('a', 5)]
+    assert board.top(3, offset=2) == [('b', 3), ('c', 3), ('d', 1)]
+    assert board.top(1, offset=3) == [('c', 3)]  # Offset lands inside a bucket
+    assert board.top(5, offset=4) == [('d', 1)]
+    assert board.top(5, offset=5) == []
+
+def test_leaderboard_update_moves_user():
+    board = main.Leaderboard({'a': 5, 'b': 3, 'c': 3})
+    version = board.top_version
+
+    board.update('c', 6)
+    assert board.top(3) == [('c', 6), ('a', 5), ('b', 3)]
+    assert board.top_version == version + 1
+
+    board.update('b', 3)
+    assert board.top_version == version + 1
+    assert len(board) == 3
@@ -0,0 +1,80 @@
+"""Replaying the storage log must reproduce the in-memory data."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+ENGINES = [main.JSONLogStorage, main.SQLiteStorage]
+
+def reopen(db, engine):
+    db.close()
+    fresh = main.Database(db.filename, storage=engine(db.filename))
+    fresh.open()
+    return fresh
+
+def flush(db):
+    db.write_records(db.take_pending())
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_warn_then_clearwarn_replays(tmp_path, engine):
+    filename = str(tmp_path / 'warnings.json')
+    db = main.Database(filename, storage=engine(filename))
+    db.open()
+    db.append(['g', 'u'], 'w1')
+    flush(db)
+
+    # One flush interval: /warn, /warn, /clearwarn #1, /clearwarn #1, /warn
+    db.append(['g', 'u'], 'w2')
+    db.append(['g', 'u'], 'w3')
+    db.set(['g', 'u'], ['w2', 'w3'])
+    db.set(['g', 'u'], ['w3'])
+    db.append(['g', 'u'], 'w4')
+    flush(db)
+
+    assert dict(reopen(db, engine)) == {'g': {'u': ['w3', 'w4']}}
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_interleaved_writes_replay(tmp_path, engine, monkeypatch):
+    monkeypatch.setattr(main, 'COMPACT_EVERY', 50)
+    filename = str(tmp_path / 'data.json')
+    db = main.Database(filename, storage=engine(filename))
+    db.open()
+    rng = random.Random(0)
+
+    for step in range(3000):
+        guild = rng.choice('ab')
+        user = rng.choice('xyz')
+        items = db.get_path([guild, user])
+        action = rng.random()
+        if action < 0.3:
+            if items is None or isinstance(items, list):
+                db.append([guild, user], step)
+        elif action < 0.45:
+            if isinstance(items, list) and items:
+                db.set([guild, user], items[rng.randrange(len(items)):])
+        elif action < 0.55:
+            if isinstance(items, list) and items:
+                db.set([guild, user, rng.randrange(len(items))], -step)
+        elif action < 0.65:
+            db.delete([guild, user])
+        elif action < 0.7:
+            db.delete([guild])
+        elif action < 0.85:
+            db.increment([guild, 'count'])
+        else:
+            db.set([guild, user], {'n': step})
+
+        if rng.random() < 0.05:
+            items = db.take_pending()
+            if rng.random() < 0.2:
+                db.restore_pending(items)  # A failed flush
+            else:
+                db.write_records(items)
+
+    expected = {key: value for key, value in dict(db).items() if value != {}}
+    replayed = {key: value for key, value in dict(reopen(db, engine)).items() if value != {}}
+    assert replayed == expected
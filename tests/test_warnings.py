@@ -0,0 +1,45 @@
+"""Warning escalation picks the strictest matching rule."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+@pytest.fixture
+def warnings(tmp_path):
+    filename = str(tmp_path / 'warnings.json')
+    db = main.Database(filename, storage=main.JSONLogStorage(filename))
+    db.open()
+    return main.WarningStore(db)
+
+def warn(warnings, times):
+    for _ in range(times):
+        warnings.add('g', 'u', 'spam', 'mod')
+
+def test_shorter_window_with_longer_timeout_wins(warnings):
+    warn(warnings, 3)
+    rules = main.parse_escalation('3/24h=1h,3/1h=1d')
+    assert warnings.escalation_for('g', 'u', rules) == (3, 3600, 86400)
+
+def test_fewer_warnings_with_longer_timeout_wins(warnings):
+    warn(warnings, 5)
+    rules = main.parse_escalation('5/7d=1h,3/24h=1d')
+    assert warnings.escalation_for('g', 'u', rules) == (3, 86400, 86400)
+
+def test_only_matched_rules_count(warnings):
+    warn(warnings, 3)
+    rules = main.parse_escalation('3/24h=1h,5/7d=1d')
+    assert warnings.escalation_for('g', 'u', rules) == (3, 86400, 3600)
+    assert warnings.escalation_for('g', 'other', rules) is None
+
+def test_expired_warnings_stop_counting_but_are_kept(warnings):
+    warn(warnings, 2)
+    warnings.db.get('g')['u'][0]['timestamp'] = '2000-01-01T00:00:00'
+    warnings.indexes.clear()
+
+    assert warnings.count('g', 'u') == 1
+    assert len(warnings.active('g', 'u')) == 1
+    assert warnings.clear('g', 'u') == 1
+    assert [w['timestamp'] for w in warnings.db['g']['u']] == ['2000-01-01T00:00:00']